@@ -1,25 +1,30 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, Cookie, status, Form
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, Request, Depends, HTTPException, Cookie, status, Form, BackgroundTasks
+from fastapi.responses import ORJSONResponse, Response
+
+import orjson
+
+import binascii
+import hashlib
 
 from rich.console import Console
 
 from typing import Optional, Dict, List, Annotated
 
-from sqlmodel import select
+from sqlalchemy import bindparam
+from sqlmodel import select, update
 
 from uuid import UUID
 
 from app.models import Doctors, User
 from app.db.main import SessionDep
-from app.core.auth import gen_token, JWTBearer, decode, time_out
+from app.core.auth import gen_token, JWTBearer, decode, ban_tokens, time_out, check_password, rehash_password
 from app.core.interfaces.oauth import OauthRepository
-from app.core.interfaces.users import UserRepository
+from app.core.interfaces.users import USER_BY_EMAIL
 from app.core.interfaces.emails import EmailService
+from app.core.services.last_login import last_login_writer
 from app.schemas.users import UserAuth
 from app.schemas.auth import TokenUserResponse, TokenDoctorsResponse, OauthCodeInput
 from app.schemas.medica_area import DoctorAuth, DoctorResponse
-from app.storage import storage
-from app.db.cache import redis_client as rc
 from app.config import TOKEN_EXPIRE_MINUTES, TOKEN_REFRESH_EXPIRE_DAYS, DEBUG
 
 from app.audit import (
@@ -41,6 +46,70 @@ auth = JWTBearer()
 COOKIE_SECURE = not DEBUG
 COOKIE_SAMESITE = "lax" if DEBUG else "strict"
 
+_SCOPES_CACHE_CONTROL = "private, max-age=30"
+
+# Cuerpos constantes pre-serializados (mismo formato que el handler de HTTPException)
+_LOGOUT_BODY = orjson.dumps({"status": "ok"})
+_INVALID_CREDENTIALS_BODY = orjson.dumps({"detail": "Invalid credentials"})
+_INVALID_CREDENTIALS_PAYLOAD_BODY = orjson.dumps({"detail": "Invalid credentials payload"})
+
+# Sentencia de login de médicos construida una sola vez; el email viaja como parámetro enlazado.
+_DOCTOR_BY_EMAIL = select(Doctors).where(Doctors.email == bindparam("email")).limit(1)
+
+_COOKIE_ATTRIBUTES = f"; Path=/; SameSite={COOKIE_SAMESITE}" + ("; Secure" if COOKIE_SECURE else "")
+_SESSION_COOKIE_TEMPLATE = f"session={{}}; HttpOnly; Max-Age={TOKEN_EXPIRE_MINUTES * 60}{_COOKIE_ATTRIBUTES}"
+_REFRESH_COOKIE_TEMPLATE = f"refresh={{}}; HttpOnly; Max-Age={TOKEN_REFRESH_EXPIRE_DAYS * 24 * 60 * 60}{_COOKIE_ATTRIBUTES}"
+
+
+_SCOPE_ADMIN = 1 << 0
+_SCOPE_SUPERUSER = 1 << 1
+_SCOPE_ACTIVE = 1 << 2
+_SCOPE_DOC = 1 << 3
+_SCOPE_GOOGLE = 1 << 4
+
+
+def _build_scopes(mask: int) -> tuple[str, ...]:
+    if mask & _SCOPE_DOC:
+        return ("doc", "active") if mask & _SCOPE_ACTIVE else ("doc",)
+    scopes = []
+    if mask & _SCOPE_ADMIN:
+        scopes.append("admin")
+    scopes.append("superuser" if mask & _SCOPE_SUPERUSER else "user")
+    if mask & _SCOPE_ACTIVE:
+        scopes.append("active")
+    if mask & _SCOPE_GOOGLE:
+        scopes.append("google")
+    return tuple(scopes)
+
+
+# Todas las combinaciones (is_admin, is_superuser, is_active, doctor, google).
+_SCOPES_TABLE: dict[int, tuple[str, ...]] = {mask: _build_scopes(mask) for mask in range(32)}
+
+
+def _scopes_for(entity: User | Doctors, google: bool = False) -> list[str]:
+    """Devuelve los scopes del token para un usuario o médico."""
+    mask = (
+        (_SCOPE_ADMIN if entity.is_admin else 0)
+        | (_SCOPE_SUPERUSER if entity.is_superuser else 0)
+        | (_SCOPE_ACTIVE if entity.is_active else 0)
+        | (_SCOPE_DOC if isinstance(entity, Doctors) else 0)
+        | (_SCOPE_GOOGLE if google else 0)
+    )
+    return list(_SCOPES_TABLE[mask])
+
+
+def _json_response(payload: dict) -> Response:
+    """Serializa el payload con orjson una sola vez y lo envuelve en un `Response` plano."""
+    return Response(orjson.dumps(payload), media_type="application/json")
+
+
+def _set_auth_cookies(response: Response, token: str, refresh_token: str) -> None:
+    """Agrega las cookies `session` y `refresh` usando cabeceras pre-renderizadas."""
+    response.raw_headers.extend((
+        (b"set-cookie", _SESSION_COOKIE_TEMPLATE.format(token).encode("latin-1")),
+        (b"set-cookie", _REFRESH_COOKIE_TEMPLATE.format(refresh_token).encode("latin-1")),
+    ))
+
 def _make_event(
     request: Request,
     *,
@@ -63,6 +132,44 @@ def _make_event(
     )
 
 
+def _doctor_payload(doc: Doctors) -> dict:
+    """Serializa un médico como `DoctorResponse` sin re-validar campos del ORM."""
+    return DoctorResponse.model_construct(
+        id=doc.id,
+        username=doc.name,
+        last_name=doc.last_name,
+        first_name=doc.first_name,
+        dni=doc.dni,
+        telephone=doc.telephone,
+        email=doc.email,
+        speciality_id=doc.speciality_id,
+        is_active=doc.is_active,
+        is_admin=doc.is_admin,
+        is_superuser=doc.is_superuser,
+        last_login=doc.last_login,
+        date_joined=doc.date_joined,
+        address=doc.address,
+    ).model_dump()
+
+
+async def _persist_login(session_db: SessionDep, entity: User | Doctors, rehashed: bool = False) -> None:
+    """
+    Persiste `last_login` vía write-behind y, si hubo re-hash, el nuevo hash.
+
+    `last_login` se encola en `last_login_writer`, que lo agrupa con otros
+    logins en un único UPDATE; solo el re-hash (poco frecuente) se escribe
+    dentro del request. La entidad se desacopla de la sesión para que el
+    commit no expire sus atributos; la respuesta se arma con los valores ya
+    cargados.
+    """
+    if rehashed:
+        model = type(entity)
+        session_db.expunge(entity)
+        session_db.execute(update(model).where(model.id == entity.id).values(password=entity.password))
+        session_db.commit()
+    await last_login_writer.enqueue(entity)
+
+
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
@@ -91,32 +198,27 @@ async def get_scopes(request: Request, user: User | Doctors = Depends(auth)):
             
     Note:
         Requiere autenticación válida. Los scopes se establecen durante login.
+        La respuesta incluye un ETag derivado del token y `Cache-Control:
+        private, max-age=30`; si `If-None-Match` coincide se responde 304.
     """
+    token = request.cookies.get("session") or request.headers.get("authorization", "").replace("Bearer ", "")
+    etag = f'"{hashlib.blake2b(token.encode(), digest_size=8).hexdigest()}"'
+    cache_headers = {"ETag": etag, "Cache-Control": _SCOPES_CACHE_CONTROL}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
     # Los scopes se establecen en request.state por el JWTBearer
     # pero para asegurarnos, también los extraemos del usuario
     scopes = getattr(request.state, 'scopes', None)
     
     # Si por alguna razón no están en request.state, construirlos desde el usuario
     if scopes is None:
-        scopes = []
-        
-        if isinstance(user, Doctors):
-            scopes.append("doc")
-            if user.is_active:
-                scopes.append("active")
-        else:  # Es un User
-            if user.is_admin:
-                scopes.append("admin")
-            if user.is_superuser:
-                scopes.append("superuser")
-            else:
-                scopes.append("user")
-            if user.is_active:
-                scopes.append("active")
+        scopes = _scopes_for(user)
     
     return ORJSONResponse({
         "scopes": scopes,
-    })
+    }, headers=cache_headers)
 
 @router.post("/decode/")
 @time_out(10)
@@ -134,11 +236,17 @@ async def decode_hex(request: Request, data: OauthCodeInput):
     Returns:
         dict: Datos decodificados en formato original
         
+    Raises:
+        HTTPException: 400 si el código no es hexadecimal válido
+        
     Note:
         Utiliza la función decode del sistema de autenticación para
         convertir bytes hexadecimales de vuelta a objetos Python.
     """
-    bytes_code = bytes.fromhex(data.code)
+    try:
+        bytes_code = binascii.a2b_hex(data.code)
+    except binascii.Error as exc:
+        raise HTTPException(status_code=400, detail="Invalid hex code") from exc
     return decode(bytes_code, dict)
 
 @router.post("/doc/login", response_model=TokenDoctorsResponse)
@@ -157,23 +265,22 @@ async def doc_login(request: Request, session_db: SessionDep, credentials: Annot
             - password (str): Contraseña del médico
             
     Returns:
-        ORJSONResponse: Respuesta con tokens y datos del médico
+        Response: JSON con tokens y datos del médico
             - access_token (str): JWT para autenticación
             - token_type (str): Tipo de token (Bearer)
             - doc (DoctorResponse): Información completa del médico
             - refresh_token (str): Token para renovación
             
     Raises:
-        HTTPException: 404 si credenciales inválidas
+        HTTPException: 403 si la cuenta está inactiva
         
     Note:
+        - Credenciales inválidas responden 404 con un cuerpo pre-serializado
         - Rate limited: máximo 1 intento cada 10 segundos
         - Actualiza last_login automáticamente
         - Scopes: ['doc'] + ['active'] si está activo
     """
-    statement = select(Doctors).where(Doctors.email == credentials.email)
-    result = session_db.exec(statement)
-    doc: Doctors = result.first()
+    doc: Doctors | None = session_db.scalar(_DOCTOR_BY_EMAIL, {"email": credentials.email})
     if not doc:
         await emitter.emit_event(
             _make_event(
@@ -183,9 +290,9 @@ async def doc_login(request: Request, session_db: SessionDep, credentials: Annot
                 details={"email": credentials.email, "role": "doctor", "reason": "not_found"},
             )
         )
-        raise HTTPException(status_code=404, detail="Invalid credentials")
+        return Response(_INVALID_CREDENTIALS_BODY, status_code=404, media_type="application/json")
 
-    if not doc.check_password(credentials.password):
+    if not await check_password(doc, credentials.password):
         await emitter.emit_event(
             _make_event(
                 request,
@@ -195,27 +302,25 @@ async def doc_login(request: Request, session_db: SessionDep, credentials: Annot
                 details={"email": credentials.email, "role": "doctor", "reason": "invalid_password"},
             )
         )
-        raise HTTPException(status_code=404, detail="Invalid credentials")
+        return Response(_INVALID_CREDENTIALS_BODY, status_code=404, media_type="application/json")
 
     doc_data = {
         "sub":str(doc.id),
-        "scopes":["doc"]
+        "scopes":_scopes_for(doc)
     }
 
-    if doc.is_active:
-        doc_data["scopes"].append("active")
-
     token = gen_token(doc_data)
     refresh_token = gen_token(doc_data, refresh=True)
 
     try:
-        record = doc.mark_login(actor_id=doc.id)
+        record = doc.mark_login(request.state.now, actor_id=doc.id)
     except ValueError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
 
-    session_db.add(doc)
-    session_db.commit()
-    session_db.refresh(doc)
+    # El re-hash (y su UPDATE) solo se paga cuando el login ya fue aceptado.
+    rehashed = await rehash_password(doc, credentials.password)
+
+    await _persist_login(session_db, doc, rehashed)
 
     await emitter.emit_record(
         record,
@@ -234,48 +339,14 @@ async def doc_login(request: Request, session_db: SessionDep, credentials: Annot
         )
     )
     
-    response = ORJSONResponse(
-        TokenDoctorsResponse(
-            access_token=token,
-            token_type="Bearer",
-            refresh_token=refresh_token,
-            doc=DoctorResponse(
-                id=doc.id,
-                username=doc.name,
-                last_name=doc.last_name,
-                first_name=doc.first_name,
-                dni=doc.dni,
-                telephone=doc.telephone,
-                email=doc.email,
-                speciality_id=doc.speciality_id,
-                is_active=doc.is_active,
-                is_admin=doc.is_admin,
-                is_superuser=doc.is_superuser,
-                last_login=doc.last_login,
-                date_joined=doc.date_joined,
-                address=doc.address
-            )
-        ).model_dump()
-    )
-    
-    response.set_cookie(
-        key="session",
-        value=token,
-        httponly=True,
-        secure=COOKIE_SECURE,
-        samesite=COOKIE_SAMESITE,
-        max_age=TOKEN_EXPIRE_MINUTES * 60
-    )
-    
-    response.set_cookie(
-        key="refresh",
-        value=refresh_token,
-        httponly=True,
-        secure=COOKIE_SECURE,
-        samesite=COOKIE_SAMESITE,
-        max_age=TOKEN_REFRESH_EXPIRE_DAYS * 24 * 60 * 60
-    )
+    response = _json_response({
+        "access_token": token,
+        "token_type": "Bearer",
+        "refresh_token": refresh_token,
+        "doc": _doctor_payload(doc),
+    })
     
+    _set_auth_cookies(response, token, refresh_token)
 
     return response
 
@@ -295,29 +366,27 @@ async def login(request: Request, session_db: SessionDep, credentials: Annotated
             - password (str): Contraseña del usuario
             
     Returns:
-        ORJSONResponse: Respuesta con tokens de autenticación
+        Response: JSON con tokens de autenticación
             - access_token (str): JWT para autenticación (15 min)
             - token_type (str): Tipo de token (Bearer)
             - refresh_token (str): Token para renovación (24 horas)
             
     Raises:
-        HTTPException: 404 si email no existe
-        HTTPException: 400 si contraseña incorrecta
+        HTTPException: 403 si la cuenta está inactiva
         
     Note:
+        - Responde 404 si el email no existe y 400 si la contraseña es
+          incorrecta, ambos con un cuerpo pre-serializado
         - Rate limited: máximo 1 intento cada 10 segundos
         - Scopes asignados según rol:
           * 'admin' para administradores
           * 'superuser' para superusuarios
           * 'user' para usuarios regulares
           * 'active' si cuenta está activa
-        - Actualiza timestamp de last_login
+        - Actualiza last_login con `request.state.now` (UTC) en segundo
+          plano (write-behind)
     """
-    #console.print(credentials)
-    statement = select(User).where(User.email == credentials.email)
-    result = session_db.exec(statement)
-    user: User = result.first()
-    #console.print(user)
+    user: User | None = session_db.scalar(USER_BY_EMAIL, {"email": credentials.email})
     if not user:
         await emitter.emit_event(
             _make_event(
@@ -327,9 +396,9 @@ async def login(request: Request, session_db: SessionDep, credentials: Annotated
                 details={"email": credentials.email, "role": "user", "reason": "not_found"},
             )
         )
-        raise HTTPException(status_code=404, detail="Invalid credentials payload")
+        return Response(_INVALID_CREDENTIALS_PAYLOAD_BODY, status_code=404, media_type="application/json")
 
-    if not user.check_password(credentials.password):
+    if not await check_password(user, credentials.password):
         await emitter.emit_event(
             _make_event(
                 request,
@@ -339,61 +408,33 @@ async def login(request: Request, session_db: SessionDep, credentials: Annotated
                 details={"email": credentials.email, "role": "user", "reason": "invalid_password"},
             )
         )
-        raise HTTPException(status_code=400, detail="Invalid credentials payload")
+        return Response(_INVALID_CREDENTIALS_PAYLOAD_BODY, status_code=400, media_type="application/json")
 
     user_data = {
         "sub":str(user.id),
-        "scopes":[]
+        "scopes":_scopes_for(user)
     }
 
-    if user.is_admin:
-        user_data["scopes"].append("admin")
-
-    if user.is_superuser:
-        user_data["scopes"].append("superuser")
-    else:
-        user_data["scopes"].append("user")
-
-    if user.is_active:
-        user_data["scopes"].append("active")
-
     token = gen_token(user_data)
     refresh_token = gen_token(user_data, refresh=True)
 
     try:
-        record = user.mark_login(actor_id=user.id)
+        record = user.mark_login(request.state.now, actor_id=user.id)
     except ValueError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
 
-    session_db.add(user)
-    session_db.commit()
-    session_db.refresh(user)
+    # El re-hash (y su UPDATE) solo se paga cuando el login ya fue aceptado.
+    rehashed = await rehash_password(user, credentials.password)
 
-    response = ORJSONResponse(
-        TokenUserResponse(
-            access_token=token,
-            token_type="Bearer",
-            refresh_token=refresh_token,
-        ).model_dump()
-    )
-    
-    response.set_cookie(
-        key="session",
-        value=token,
-        httponly=True,
-        secure=COOKIE_SECURE,
-        samesite=COOKIE_SAMESITE,
-        max_age=TOKEN_EXPIRE_MINUTES * 60
-    )
+    await _persist_login(session_db, user, rehashed)
+
+    response = _json_response({
+        "access_token": token,
+        "token_type": "Bearer",
+        "refresh_token": refresh_token,
+    })
     
-    response.set_cookie(
-        key="refresh",
-        value=refresh_token,
-        httponly=True,
-        secure=COOKIE_SECURE,
-        samesite=COOKIE_SAMESITE,
-        max_age=TOKEN_REFRESH_EXPIRE_DAYS * 24 * 60 * 60
-    )
+    _set_auth_cookies(response, token, refresh_token)
 
     return response
 
@@ -430,7 +471,7 @@ async def oauth_login(service: str):
         raise HTTPException(status_code=500, detail=str(e))
     
 @oauth_router.get("/webhook/google_callback")
-async def google_callback(request: Request, emitter: AuditEmitter = Depends(get_audit_emitter)):
+async def google_callback(request: Request, background: BackgroundTasks, emitter: AuditEmitter = Depends(get_audit_emitter)):
     """
     Maneja la respuesta del callback de Google OAuth.
     
@@ -440,6 +481,7 @@ async def google_callback(request: Request, emitter: AuditEmitter = Depends(get_
     Args:
         request (Request): Request con parámetros de query de Google
             - code (str): Código de autorización de Google
+        background (BackgroundTasks): Tareas a ejecutar tras enviar la respuesta
             
     Returns:
         RedirectResponse: Respuesta del repositorio OAuth
@@ -449,6 +491,7 @@ async def google_callback(request: Request, emitter: AuditEmitter = Depends(get_
         
     Note:
         - Para usuarios nuevos: envía email de bienvenida + credenciales
+          en segundo plano, después de responder el redirect
         - Para usuarios existentes: completa autenticación
         - Las credenciales temporales usan el ID de Google como contraseña
     """
@@ -471,14 +514,19 @@ async def google_callback(request: Request, emitter: AuditEmitter = Depends(get_
             )
         )
         if not exist:
-            EmailService.send_welcome_email(
+            background.add_task(
+                EmailService.send_welcome_email,
                 email=data.get("email"),
                 first_name=data.get("given_name"),
                 last_name=data.get("family_name")
             )
-            EmailService.send_google_account_linked_password(email=data.get("email"), first_name=data.get("given_name"),
-                                                            last_name=data.get("family_name"),
-                                                            raw_password=data.get("id"))
+            background.add_task(
+                EmailService.send_google_account_linked_password,
+                email=data.get("email"),
+                first_name=data.get("given_name"),
+                last_name=data.get("family_name"),
+                raw_password=data.get("id")
+            )
 
         return response
     except Exception as e:
@@ -495,13 +543,9 @@ async def refresh(
     if isinstance(user, Doctors):
         doc_data = {
             "sub":str(user.id),
-            "scopes":["doc"]
+            "scopes":_scopes_for(user)
         }
 
-        if user.is_active:
-            doc_data["scopes"].append("active")
-
-
         token = gen_token(doc_data)
         refresh_token = gen_token(doc_data)
 
@@ -516,68 +560,22 @@ async def refresh(
             )
         )
 
-        response = ORJSONResponse(
-            TokenDoctorsResponse(
-                access_token=token,
-                token_type="Bearer",
-                refresh_token=refresh_token,
-                doc=DoctorResponse(
-                    id=user.id,
-                    username=user.name,
-                    last_name=user.last_name,
-                    first_name=user.first_name,
-                    dni=user.dni,
-                    telephone=user.telephone,
-                    email=user.email,
-                    speciality_id=user.speciality_id,
-                    is_active=user.is_active,
-                    is_admin=user.is_admin,
-                    is_superuser=user.is_superuser,
-                    last_login=user.last_login,
-                    date_joined=user.date_joined,
-                )
-            ).model_dump()
-        )
+        response = _json_response({
+            "access_token": token,
+            "token_type": "Bearer",
+            "refresh_token": refresh_token,
+            "doc": _doctor_payload(user),
+        })
         
-        response.set_cookie(
-            key="session",
-            value=token,
-            httponly=True,
-            secure=COOKIE_SECURE,
-            samesite=COOKIE_SAMESITE,
-            max_age=TOKEN_EXPIRE_MINUTES * 60
-        )
-    
-        response.set_cookie(
-            key="refresh",
-            value=refresh_token,
-            httponly=True,
-            secure=COOKIE_SECURE,
-            samesite=COOKIE_SAMESITE,
-            max_age=TOKEN_REFRESH_EXPIRE_DAYS * 24 * 60 * 60
-        )
+        _set_auth_cookies(response, token, refresh_token)
         
         return response
 
     user_data = {
         "sub":str(user.id),
-        "scopes":[]
+        "scopes":_scopes_for(user, google="google" in request.state.scopes)
     }
 
-    if user.is_admin:
-        user_data["scopes"].append("admin")
-
-    if user.is_superuser:
-        user_data["scopes"].append("superuser")
-    else:
-        user_data["scopes"].append("user")
-
-    if user.is_active:
-        user_data["scopes"].append("active")
-        
-    if "google" in request.state.scopes:
-        user_data["scopes"].append("google")
-
     token = gen_token(user_data)
     refresh_token = gen_token(user_data, refresh=True)
 
@@ -592,36 +590,18 @@ async def refresh(
         )
     )
 
-    response = ORJSONResponse(
-        TokenUserResponse(
-            access_token=token,
-            token_type="bearer",
-            refresh_token=refresh_token,
-        ).model_dump()
-    )
-    
-    response.set_cookie(
-            key="session",
-            value=token,
-            httponly=True,
-            secure=COOKIE_SECURE,
-            samesite=COOKIE_SAMESITE,
-            max_age=TOKEN_EXPIRE_MINUTES * 60
-        )
+    response = _json_response({
+        "access_token": token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    })
     
-    response.set_cookie(
-            key="refresh",
-            value=refresh_token,
-            httponly=True,
-            secure=COOKIE_SECURE,
-            samesite=COOKIE_SAMESITE,
-            max_age=TOKEN_REFRESH_EXPIRE_DAYS * 24 * 60 * 60
-        )
+    _set_auth_cookies(response, token, refresh_token)
         
     return response
 
 @router.delete("/logout")
-async def logout(request: Request, session: Optional[str] = Cookie(None), _=Depends(auth), emitter: AuditEmitter = Depends(get_audit_emitter)):
+async def logout(request: Request, session: Optional[str] = Cookie(None), refresh: Optional[str] = Cookie(None), _=Depends(auth), emitter: AuditEmitter = Depends(get_audit_emitter)):
     """
     Cierra la sesión del usuario invalidando su token.
     
@@ -631,18 +611,19 @@ async def logout(request: Request, session: Optional[str] = Cookie(None), _=Depe
     Args:
         request (Request): Request con información del usuario autenticado
         session (str, optional): Cookie "session" con el token
+        refresh (str, optional): Cookie "refresh" con el refresh token
         _ (User): Usuario autenticado (inyección de dependencia)
         
     Returns:
-        dict: Confirmación del logout con detalles del almacenamiento
+        Response: Confirmación del logout (`{"status": "ok"}`)
         
     Raises:
         HTTPException: 403 si no hay credenciales o formato inválido
         
     Note:
-        - El token queda permanentemente invalidado
-        - Se almacena en tabla 'ban-token' del storage
-        - Actualiza registro existente si el usuario ya tenía tokens baneados
+        - Cada token queda invalidado hasta su propio vencimiento
+        - Cada token se guarda en la clave Redis 'ban:{user_id}:{digest}'
+          que expira junto con el `exp` del propio token
     """
     if session is None:
         raise HTTPException(
@@ -654,14 +635,7 @@ async def logout(request: Request, session: Optional[str] = Cookie(None), _=Depe
 
     token = session
 
-    table_name = "ban-token"
-    try:
-        payload = decode_token(token)
-        exp_ts = int(payload.get("exp", 0))
-    except Exception:
-        exp_ts = int(time.time()) + TOKEN_EXPIRE_MINUTES * 60
-    ttl = max(0, exp_ts - int(time.time()))
-    rc.setex(f"ban-token:{str(session_user.id)}", ttl, token)
+    ban_tokens(session_user.id, token, refresh)
 
     await emitter.emit_event(
         _make_event(
@@ -671,11 +645,11 @@ async def logout(request: Request, session: Optional[str] = Cookie(None), _=Depe
             actor_id=session_user.id,
             target_id=session_user.id,
             severity=AuditSeverity.INFO,
-            details={"table": table_name},
+            details={"ban_store": "redis"},
         )
     )
 
-    response = ORJSONResponse({"status":"ok"})
+    response = Response(_LOGOUT_BODY, media_type="application/json")
     
     response.delete_cookie(
             key="session",
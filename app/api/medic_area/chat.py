@@ -149,7 +149,7 @@ async def websocket_chat(
             await websocket.close(1008, reason="You are not authorized")
             return
 
-        chat_db = session.exec(select(Chat).where(Chat.id == chat_id)).first()
+        chat_db = session.get(Chat, chat_id)
 
         if chat_db.doc_1_id != doc.id and chat_db.doc_2_id != doc.id:
             await websocket.close(1008, reason="doctor unauthorized")
@@ -165,7 +165,7 @@ async def websocket_chat(
             data = await websocket.receive_json()
             content = data["content"]
 
-            chat_db = session.exec(select(Chat).where(Chat.id == chat_id)).first()
+            chat_db = session.get(Chat, chat_id)
 
             message = ChatMessages(
                 sender_id=doc.id,
@@ -191,23 +191,7 @@ async def get_patients_by_doctor(
 
         return ORJSONResponse(
             [
-                UserRead(
-                    id=user.id,
-                    is_active=user.is_active,
-                    is_admin=user.is_admin,
-                    is_superuser=user.is_superuser,
-                    last_login=user.last_login,
-                    date_joined=user.date_joined,
-                    username=user.name,
-                    email=user.email,
-                    first_name=user.first_name,
-                    last_name=user.last_name,
-                    dni=user.dni,
-                    address=user.address,
-                    telephone=user.telephone,
-                    blood_type=user.blood_type,
-                    img_profile=user.url_image_profile,
-                ).model_dump()
+                UserRead.from_user(user).model_dump()
                 for user in users_list
             ],
             status_code=status.HTTP_200_OK,
@@ -327,7 +311,7 @@ async def delete_doctor_schedule_by_id(
             detail="scopes have not unauthorized",
         )
 
-    doc = session.exec(select(Doctors).where(Doctors.id == doctor_id)).first()
+    doc = session.get(Doctors, doctor_id)
 
     doc.medical_schedules = [i for i in doc.medical_schedules if i.id != schedule_id]
 
@@ -374,7 +358,7 @@ async def update_doctor(
         )
 
     try:
-        doc = session.exec(select(Doctors).where(Doctors.id == doctor_id)).first()
+        doc = session.get(Doctors, doctor_id)
 
         form_fields = doctor.__fields__.keys()
         actor = getattr(request.state, "user", None)
@@ -471,7 +455,7 @@ async def update_speciality(
         )
 
     try:
-        doc = session.exec(select(Doctors).where(Doctors.id == doctor_id)).first()
+        doc = session.get(Doctors, doctor_id)
 
         doc.speciality_id = doctor_form.speciality_id
 
@@ -525,7 +509,7 @@ async def update_doctor_password(
         )
 
     try:
-        doc = session.exec(select(Doctors).where(Doctors.id == doctor_id)).first()
+        doc = session.get(Doctors, doctor_id)
 
         doc.set_password(password.password)
 
@@ -564,7 +548,7 @@ async def add_schedule_by_id(
         )
 
     try:
-        doc = session.exec(select(Doctors).where(Doctors.id == doc_id)).first()
+        doc = session.get(Doctors, doc_id)
         schedule = session.exec(
             select(MedicalSchedules).where(MedicalSchedules.id == schedule_id)
         ).first()
@@ -607,7 +591,7 @@ async def ban_doc(request: Request, doc_id: UUID, session: SessionDep):
             detail="scopes have not unauthorized",
         )
 
-    doc = session.exec(select(Doctors).where(Doctors.id == doc_id)).first()
+    doc = session.get(Doctors, doc_id)
 
     if not doc:
         raise HTTPException(status_code=404, detail=f"Doctor {doc_id} not found")
@@ -654,7 +638,7 @@ async def unban_doc(request: Request, doc_id: UUID, session: SessionDep):
             detail="scopes have not unauthorized",
         )
 
-    doc = session.exec(select(Doctors).where(Doctors.id == doc_id)).first()
+    doc = session.get(Doctors, doc_id)
 
     if not doc:
         raise HTTPException(status_code=404, detail=f"Doctor {doc_id} not found")
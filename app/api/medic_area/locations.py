@@ -161,7 +161,7 @@ async def delete_location(request: Request, location_id: UUID, session: SessionD
             detail="scopes have not unauthorized",
         )
 
-    location = session.exec(select(Locations).where(Locations.id == location_id)).first()
+    location = session.get(Locations, location_id)
 
     session.delete(location)
     session.commit()
@@ -184,7 +184,7 @@ async def update_location(
             detail="scopes have not unauthorized",
         )
 
-    new_location = session.exec(select(Locations).where(Locations.id == location_id)).first()
+    new_location = session.get(Locations, location_id)
 
     new_location.name = location.name
     new_location.description = location.description
@@ -108,7 +108,7 @@ async def set_service(request: Request, session: SessionDep, service: ServiceCre
 @router.delete("/delete/{service_id}", response_model=ServiceDelete)
 async def delete_service(request: Request, session: SessionDep, service_id: UUID):
     try:
-        service = session.exec(select(Services).where(Services.id == service_id)).first()
+        service = session.get(Services, service_id)
 
         session.delete(service)
         session.commit()
@@ -136,7 +136,7 @@ async def update_service(
             detail="scopes have not unauthorized",
         )
 
-    new_service = session.exec(select(Services).where(Services.id == service_id)).first()
+    new_service = session.get(Services, service_id)
 
     fields = service.__fields__.keys()
 
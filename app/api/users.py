@@ -1,12 +1,11 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, status, Form, UploadFile
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, Request, Depends, HTTPException, status, Form, UploadFile, Query, BackgroundTasks
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from json import dumps, loads
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.orm import raiseload, selectinload
 
-from typing import List, Annotated, Optional, Tuple
-
-from rich.console import Console
+from typing import List, Annotated, Iterator, Optional, Tuple
 
 from datetime import datetime
 
@@ -16,12 +15,16 @@ from pathlib import Path
 
 from uuid import UUID
 
+import logging
+
 import re
 
 import secrets
 
 import string
 
+import orjson
+
 import pytesseract
 
 import numpy as np
@@ -34,12 +37,13 @@ from app.schemas.users import UserRead, UserCreate, UserDelete, UserUpdate, User
 from app.models import User, HealthInsurance
 from app.core.auth import JWTBearer
 from app.db.main import SessionDep
+from app.db.session import session_factory
 from app.core.interfaces.emails import EmailService
-from app.core.interfaces.users import UserRepository
+from app.core.interfaces.users import UserRepository, USER_BY_EMAIL
 from app.core.auth import encode, decode
 from app.storage import storage
 from app.db.cache import redis_client as rc
-from app.config import CORS_HOST, EMAIL_HOST_USER, BINARIES_DIR
+from app.config import CORS_HOST, EMAIL_HOST_USER, BINARIES_DIR, USERS_LIST_DEFAULT_LIMIT, USERS_LIST_MAX_LIMIT
 
 from app.audit import (
     AuditAction,
@@ -56,7 +60,7 @@ TESS_DIGITS = "-c tessedit_char_whitelist=0123456789 --oem 3"
 
 pytesseract.pytesseract.tesseract_cmd = BINARIES_DIR / "tesseract.exe"
 
-console = Console()
+_LOGGER = logging.getLogger("app.api.users")
 
 auth = JWTBearer()
 
@@ -431,19 +435,97 @@ public_router = APIRouter(
     redirect_slashes=True,
 )
 
+_STREAM_CHUNK_ROWS = 256
+
+# Carga los seguros médicos en una sola query y falla ante cualquier otro lazy load.
+_WITH_HEALTH_INSURANCE = [selectinload(User.health_insurance), raiseload("*")]
+
+# Columnas que serializa `UserRead`, etiquetadas con sus nombres de salida;
+# evita traer `password` y demás columnas que la respuesta no usa.
+_USER_READ_COLUMNS = (
+    User.id,
+    User.is_active,
+    User.is_admin,
+    User.is_superuser,
+    User.last_login,
+    User.date_joined,
+    User.name.label("username"),
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.dni,
+    User.address,
+    User.telephone,
+    User.blood_type,
+    User.url_image_profile.label("img_profile"),
+)
+
+def _stream_users(statement) -> Iterator[bytes]:
+    """
+    Emite el resultado de `get_users` como un arreglo JSON a medida que llegan las filas.
+
+    Usa su propia sesión: la de la dependencia se cierra antes de que
+    `StreamingResponse` empiece a consumir el generador. Con `yield_per`
+    solo hay un bloque de `_STREAM_CHUNK_ROWS` filas en memoria a la vez.
+    """
+    with session_factory() as session:
+        result = session.execute(
+            statement.execution_options(yield_per=_STREAM_CHUNK_ROWS)
+        ).mappings()
+        yield b"["
+        for index, partition in enumerate(result.partitions()):
+            chunk = b",".join(
+                orjson.dumps({**row, "health_insurance": []}) for row in partition
+            )
+            yield chunk if index == 0 else b"," + chunk
+        yield b"]"
+
+
+def _user_read(user: User, *, with_health_insurance: bool = False) -> dict:
+    """
+    Serializa un `User` con la forma de `UserRead` sin validar.
+
+    Los datos provienen de la base, por lo que `UserRead.from_user` usa
+    `model_construct` en lugar de la validación completa de Pydantic.
+
+    Args:
+        user (User): Usuario a serializar
+        with_health_insurance (bool): Incluir los ids de seguros médicos
+            (requiere la relación cargada)
+
+    Returns:
+        dict: Campos de `UserRead`
+    """
+    return UserRead.from_user(user, with_health_insurance=with_health_insurance).model_dump()
+
+def _persist_is_active(session: SessionDep, user: User) -> None:
+    """
+    Persiste `is_active` con un único UPDATE, sin flush ni refresh del ORM.
+
+    La entidad se desacopla de la sesión antes del commit para que sus
+    atributos sigan disponibles para armar la respuesta.
+    """
+    session.expunge(user)
+    session.execute(update(User).where(User.id == user.id).values(is_active=user.is_active))
+    session.commit()
+
 @private_router.get("/", response_model=List[UserRead])
-async def get_users(session_db: SessionDep):
+def get_users(
+    limit: int = Query(USERS_LIST_DEFAULT_LIMIT, ge=1, le=USERS_LIST_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+):
     """
-    Obtiene lista completa de todos los usuarios del sistema.
+    Obtiene una página de usuarios del sistema.
     
-    Recupera todos los usuarios registrados con su información completa,
+    Recupera los usuarios registrados con su información completa,
     incluyendo datos personales, estado de activación y seguros médicos.
     
     Args:
-        session (SessionDep): Sesión de base de datos inyectada
+        limit (int): Cantidad máxima de usuarios a devolver
+        offset (int): Cantidad de usuarios a saltear (ordenados por id)
         
     Returns:
-        ORJSONResponse: Lista de usuarios serializados con campos:
+        StreamingResponse: Arreglo JSON de usuarios con campos:
             - id, is_active, is_admin, is_superuser
             - last_login, date_joined
             - username, email, first_name, last_name
@@ -451,43 +533,17 @@ async def get_users(session_db: SessionDep):
             - img_profile, health_insurance
             
     Note:
-        Requiere autenticación. Incluye logs de debug para troubleshooting.
+        Requiere autenticación. Solo selecciona las columnas serializadas
+        por `UserRead`, sin hidratar instancias ORM ni validar con Pydantic;
+        las filas se leen del cursor con `yield_per` y el arreglo JSON se
+        emite en bloques con orjson mientras la base sigue produciendo filas.
     """
-    statement = select(User).where(True)
-    result: List[User] = session_db.exec(statement).scalars().all()
-    users = []
-    console.print(result)
-    console.print(User.__table__)
-    for user in result:
-        console.print(user)
-        try:
-            console.print(user.id)
-        except Exception:
-            console.print_exception(show_locals=True)
-        users.append(
-            UserRead(
-                id=user.id,
-                is_active=user.is_active,
-                is_admin=user.is_admin,
-                is_superuser=user.is_superuser,
-                last_login=user.last_login,
-                date_joined=user.date_joined,
-                username=user.name,
-                email=user.email,
-                first_name=user.first_name,
-                last_name=user.last_name,
-                dni=user.dni,
-                address=user.address,
-                telephone=user.telephone,
-                blood_type=user.blood_type,
-                img_profile=user.url_image_profile
-            ).model_dump()
-        )
+    statement = select(*_USER_READ_COLUMNS).order_by(User.id).limit(limit).offset(offset)
 
-    return ORJSONResponse(users)
+    return StreamingResponse(_stream_users(statement), media_type="application/json")
 
 @private_router.get("/{user_id}/")
-async def get_user_by_id(session_db: SessionDep, user_id: UUID):
+def get_user_by_id(session_db: SessionDep, user_id: UUID):
     """
     Obtiene información detallada de un usuario específico por su ID.
     
@@ -507,33 +563,14 @@ async def get_user_by_id(session_db: SessionDep, user_id: UUID):
     Note:
         Requiere autenticación válida.
     """
-    user: User = session_db.get(User, user_id)
+    user: User = session_db.get(User, user_id, options=_WITH_HEALTH_INSURANCE)
     if not user:
         raise HTTPException(status_code=404, detail="Not found")
 
-    return ORJSONResponse(
-        UserRead(
-            id=user.id,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            username=user.name,
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            dni=user.dni,
-            blood_type=user.blood_type,
-            address=user.address,
-            telephone=user.telephone,
-            img_profile=user.url_image_profile,
-            health_insurance=[i.id for i in user.health_insurance]
-        ).model_dump()
-    )
+    return ORJSONResponse(_user_read(user, with_health_insurance=True))
 
 @private_router.get("/me", response_model=UserRead)
-async def me_user(request: Request, session_db: SessionDep):
+def me_user(request: Request, session_db: SessionDep):
     """
     Obtiene el perfil del usuario autenticado actualmente.
     
@@ -563,24 +600,7 @@ async def me_user(request: Request, session_db: SessionDep):
     session_db.refresh(user)
 
     return ORJSONResponse({
-        "user":UserRead(
-            id=user.id,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            username=user.name,
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            dni=user.dni,
-            telephone=user.telephone,
-            blood_type=user.blood_type,
-            address=user.address,
-            img_profile=user.url_image_profile,
-            health_insurance=[h.id for h in user.health_insurance]
-        ).model_dump(),
+        "user":_user_read(user, with_health_insurance=True),
     })
 
 @public_router.post("/add/", response_model=UserRead)
@@ -623,28 +643,9 @@ async def add_user(session_db: SessionDep, user: Annotated[UserCreate, Form(...)
         session_db.add(user_db)
         session_db.commit()
         session_db.refresh(user_db)
-        return ORJSONResponse(
-            UserRead(
-                id=user_db.id,
-                is_active=user_db.is_active,
-                is_admin=user_db.is_admin,
-                is_superuser=user_db.is_superuser,
-                last_login=user_db.last_login,
-                date_joined=user_db.date_joined,
-                username=user_db.name,
-                email=user_db.email,
-                first_name=user_db.first_name,
-                last_name=user_db.last_name,
-                dni=user_db.dni,
-                address=user_db.address,
-                telephone=user_db.telephone,
-                blood_type=user_db.blood_type,
-                img_profile=user_db.url_image_profile,
-                health_insurance=[h.id for h in user_db.health_insurance]
-            ).model_dump()
-        )
+        return ORJSONResponse(_user_read(user_db, with_health_insurance=True))
     except Exception as e:
-        console.print_exception(show_locals=True)
+        _LOGGER.exception("Failed to create user")
         return ORJSONResponse({"error": str(e)}, status_code=400)
     
 @private_router.post("/verify/dni")
@@ -666,9 +667,10 @@ async def verify_dni(request: Request, dni_form: Annotated[DniForm, Form(...)],
         
         try:
             dni, debug_info = extract_dni_from_images(img1, img2)
-            console.print(f"DNI extraído: {dni}")
-            console.print(f"Confianza: {debug_info['confidence']:.2%}")
-            console.print(f"Fuente: {debug_info['selected']}")
+            _LOGGER.debug(
+                "DNI extracted with confidence %.2f%% from %s",
+                debug_info["confidence"] * 100, debug_info["selected"],
+            )
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         
@@ -700,12 +702,12 @@ async def verify_dni(request: Request, dni_form: Annotated[DniForm, Form(...)],
     except HTTPException:
         raise
     except Exception as e:
-        console.print_exception(show_locals=True)
+        _LOGGER.exception("Failed to process DNI images")
         raise HTTPException(status_code=400, 
                           detail=f"Error procesando las imágenes: {str(e)}")
 
 @private_router.delete("/delete/{user_id}/", response_model=UserDelete)
-async def delete_user(request: Request, user_id: UUID, session_db: SessionDep):
+def delete_user(request: Request, user_id: UUID, session_db: SessionDep):
     """
     Elimina permanentemente un usuario del sistema.
     
@@ -744,7 +746,7 @@ async def delete_user(request: Request, user_id: UUID, session_db: SessionDep):
         )
         return ORJSONResponse(user_deleted.model_dump())
     except Exception:
-        console.print_exception(show_locals=True)
+        _LOGGER.exception("Failed to delete user %s", user_id)
         return ORJSONResponse({"error": "User not found"}, status_code=404)
 
 @private_router.patch("/update/{user_id}/", response_model=UserRead)
@@ -756,32 +758,23 @@ async def update_user(request: Request, user_id: UUID, session_db: SessionDep, u
             detail="scopes have not un unauthorized",
         )
 
-    user: User = session_db.get(User, user_id)
+    user: User = session_db.get(User, user_id, options=_WITH_HEALTH_INSURANCE)
 
-    console.print(user_form.health_insurance)
-    
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    form_fields: List[str] = user_form.__fields__.keys()
-
-    for field in form_fields:
-        value = getattr(user_form, field, None)
-        if not field in ["username", "health_insurance", "img_profile"] and value is not None and not value in ["", " "]:
+    data = user_form.model_dump(exclude_unset=True, exclude={"health_insurance", "img_profile"})
+    username = data.pop("username", None)
+    if username not in (None, "", " "):
+        user.name = username
+    for field, value in data.items():
+        if value not in (None, "", " "):
             setattr(user, field, value)
-        elif field == "username" and value is not None and not value in ["", " "]:
-            if not value:
-                raise HTTPException(status_code=400, detail="Username cannot be empty")
-            user.name = user_form.username
-        elif field  == "health_insurance" and value is not None:
-            for health_insurance_i in user_form.health_insurance:
-                health_insurance_oj = session_db.get(HealthInsurance, health_insurance_i)
-                if not health_insurance_oj in user.health_insurance:
-                    user.health_insurance.append(health_insurance_oj)
-            else:
-                continue
-        else:
-            continue
+
+    for health_insurance_i in user_form.health_insurance or []:
+        health_insurance_oj = session_db.get(HealthInsurance, health_insurance_i)
+        if not health_insurance_oj in user.health_insurance:
+            user.health_insurance.append(health_insurance_oj)
 
     if user_form.img_profile and not "google" in request.state.scopes:
         await user.save_profile_image(user_form.img_profile)
@@ -790,47 +783,26 @@ async def update_user(request: Request, user_id: UUID, session_db: SessionDep, u
     session_db.commit()
     session_db.refresh(user)
 
-    return ORJSONResponse(
-        UserRead(
-            id=user.id,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            username=user.name,
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            dni=user.dni,
-            blood_type=user.blood_type,
-            img_profile=user.url_image_profile,
-            health_insurance=[h.id for h in user.health_insurance]
-
-        ).model_dump()
-    )
+    return ORJSONResponse(_user_read(user, with_health_insurance=True))
 
 @public_router.post("/update/petition/password")
 async def update_petition_password(
     request: Request,
     session_db: SessionDep,
     data: Annotated[UserPetitionPasswordUpdate, Form(...)],
+    background: BackgroundTasks,
     emitter: AuditEmitter = Depends(get_audit_emitter),
 ):
     try:
-        user: User | None = session_db.exec(
-            select(User).where(User.email == data.email)
-        ).scalar_one_or_none()
+        user: User | None = session_db.scalar(USER_BY_EMAIL, {"email": data.email})
 
         if not user:
-            return ORJSONResponse({"detail": "User not found"}, status_code=404)
+            return ORJSONResponse({"detail": "Ok 200"}, status_code=200)
 
         code = [secrets.choice(string.ascii_letters + string.digits) for _ in range(6)]
 
         r_cod = "".join(code)
         
-        console.print(f"User: {user} - Date Type: {type(user)}")
-        
         r_code_data = {
             "user": str(user.id),
             "r_cod": r_cod,
@@ -850,21 +822,19 @@ async def update_petition_password(
             )
         )
 
-        EmailService.send_password_reset_email(user.email, reset_code=r_cod)
+        background.add_task(EmailService.send_password_reset_email, user.email, reset_code=r_cod)
 
         return ORJSONResponse({"detail": "Ok 200"}, status_code=200)
 
     except Exception:
-        console.print_exception(show_locals=True)
+        _LOGGER.exception("Failed to issue password reset code")
         return ORJSONResponse({"detail":"Ok 200"}, status_code=200)
     
 @public_router.post("update/verify/code")
-async def verify_code(session_db: SessionDep, email: str = Form(...), code: str = Form(...)):
+def verify_code(session_db: SessionDep, email: str = Form(...), code: str = Form(...)):
     try:
-        # Usar scalar_one_or_none para obtener un objeto User directo o None
-        user = session_db.scalar(
-            select(User).where(User.email == email)
-        )
+        # scalar devuelve el User directo o None
+        user = session_db.scalar(USER_BY_EMAIL, {"email": email})
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -887,22 +857,21 @@ async def verify_code(session_db: SessionDep, email: str = Form(...), code: str
         # Re-lanzar HTTPExceptions (404, 400) sin modificar
         raise
     except Exception as e:
-        console.print_exception(show_locals=True)
+        _LOGGER.exception("Failed to verify password reset code")
         raise HTTPException(status_code=500, detail="Internal server error")
     
 @public_router.post("/update/confirm/password", response_model=UserRead)
 async def update_confirm_password(
     request: Request,
     session: SessionDep,
+    background: BackgroundTasks,
     email: str = Form(...),
     code: str = Form(...),
     new_password: str = Form(...),
     emitter: AuditEmitter = Depends(get_audit_emitter),
 ):
     try:
-        user: User = session.exec(
-            select(User).where(User.email == email)
-        ).first()[0]
+        user: User | None = session.scalar(USER_BY_EMAIL, {"email": email})
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -932,34 +901,19 @@ async def update_confirm_password(
             )
         )
 
-        EmailService.send_password_changed_notification_email(
+        background.add_task(
+            EmailService.send_password_changed_notification_email,
             user.email,
             help_link=f"{CORS_HOST}/support",
             contact_email=EMAIL_HOST_USER,
             contact_number="1234567890"
         )
 
-        return ORJSONResponse(
-            UserRead(
-                id=user.id,
-                is_active=user.is_active,
-                is_admin=user.is_admin,
-                is_superuser=user.is_superuser,
-                last_login=user.last_login,
-                date_joined=user.date_joined,
-                username=user.name,
-                email=user.email,
-                first_name=user.first_name,
-                last_name=user.last_name,
-                dni=user.dni,
-                blood_type=user.blood_type,
-                img_profile=user.url_image_profile
-            ).model_dump()
-        )
+        return ORJSONResponse(_user_read(user))
     except HTTPException as he:
         raise he
     except Exception:
-        console.print_exception(show_locals=True)
+        _LOGGER.exception("Failed to confirm password reset")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -969,16 +923,15 @@ async def update_user_password(
     user_id: UUID,
     session: SessionDep,
     user_form: UserPasswordUpdate,
+    background: BackgroundTasks,
     emitter: AuditEmitter = Depends(get_audit_emitter),
 ):
 
     if not request.state.user.id == user_id and not request.state.user.is_superuser:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="scopes have not un unauthorized")
 
-    user: User = session.get(User, user_id)
+    user: User = session.get(User, user_id, options=[raiseload("*")])
     
-    console.print(f"User Form: {user}")
-
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -1009,32 +962,15 @@ async def update_user_password(
         )
     )
 
-    EmailService.send_password_changed_notification_email(
+    background.add_task(
+        EmailService.send_password_changed_notification_email,
         user.email,
         help_link="https://support.google.com/accounts/answer/41078?hl=en",
         contact_email="email@email.com",
         contact_number="1234567890"
     )
 
-    return ORJSONResponse(
-        UserRead(
-            id=user.id,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            username=user.name,
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            dni=user.dni,
-            blood_type=user.blood_type,
-            telephone=user.telephone,
-            address=user.address,
-            img_profile=user.url_image_profile,
-        ).model_dump()
-    )
+    return ORJSONResponse(_user_read(user))
 
 @private_router.patch("/ban/{user_id}/", response_model=UserRead)
 async def ban_user(
@@ -1046,7 +982,7 @@ async def ban_user(
     if not request.state.user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    user: User = session_db.get(User, user_id)
+    user: User = session.get(User, user_id, options=[raiseload("*")])
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1056,9 +992,7 @@ async def ban_user(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+    _persist_is_active(session, user)
 
     await emitter.emit_record(
         record,
@@ -1067,21 +1001,7 @@ async def ban_user(
     )
 
     return ORJSONResponse({
-        "user":UserRead(
-            id=user.id,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            username=user.name,
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            dni=user.dni,
-            blood_type=user.blood_type,
-            img_profile=user.url_image_profile
-        ).model_dump(),
+        "user":_user_read(user),
         "message":f"User {user.name} has been banned."
     })
 
@@ -1095,7 +1015,7 @@ async def unban_user(
     if not request.state.user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    user: User = session_db.get(User, user_id)
+    user: User = session.get(User, user_id, options=[raiseload("*")])
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1105,9 +1025,7 @@ async def unban_user(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+    _persist_is_active(session, user)
 
     await emitter.emit_record(
         record,
@@ -1116,21 +1034,7 @@ async def unban_user(
     )
 
     return ORJSONResponse({
-        "user":UserRead(
-            id=user.id,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            username=user.name,
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            dni=user.dni,
-            blood_type=user.blood_type,
-            img_profile=user.url_image_profile
-        ).model_dump(),
+        "user":_user_read(user),
         "message":f"User {user.name} has been unbanned."
     })
 
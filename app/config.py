@@ -45,6 +45,8 @@ API_NAME = "Hospital API"
 VERSION = "0.10.7"
 
 DB_URL = os.getenv("DB_URL")
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
 
 REDIS_URL = os.getenv("REDIS_URL")
 REDIS_HOST = os.getenv("REDIS_HOST")
@@ -97,6 +99,13 @@ AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", 50))
 AUDIT_LINGER_SECONDS: float = float(os.getenv("AUDIT_LINGER_SECONDS", 0.5))
 AUDIT_RETRY_DELAY: float = float(os.getenv("AUDIT_RETRY_DELAY", 1.0))   
 
+LAST_LOGIN_QUEUE_SIZE: int = int(os.getenv("LAST_LOGIN_QUEUE_SIZE", 10000))
+LAST_LOGIN_BATCH_SIZE: int = int(os.getenv("LAST_LOGIN_BATCH_SIZE", 1000))
+LAST_LOGIN_LINGER_SECONDS: float = float(os.getenv("LAST_LOGIN_LINGER_SECONDS", 0.5))
+
+USERS_LIST_DEFAULT_LIMIT: int = int(os.getenv("USERS_LIST_DEFAULT_LIMIT", 100))
+USERS_LIST_MAX_LIMIT: int = int(os.getenv("USERS_LIST_MAX_LIMIT", 1000))
+
 AUDIT_LIST_DEFAULT_LIMIT: int = int(os.getenv("AUDIT_LIST_DEFAULT_LIMIT", 100))
 AUDIT_LIST_MAX_LIMIT: int = int(os.getenv("AUDIT_LIST_MAX_LIMIT", 500))
 AUDIT_EXPORT_DEFAULT_LIMIT: int = int(os.getenv("AUDIT_EXPORT_DEFAULT_LIMIT", 1000))
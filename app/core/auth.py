@@ -3,6 +3,16 @@ from jwt import PyJWTError
 
 from datetime import datetime, timedelta
 import time
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from cachetools import TTLCache
 
 from pydantic import BaseModel
 
@@ -10,8 +20,6 @@ from fastapi import Cookie, Header, HTTPException, status, Request, WebSocket
 
 from functools import singledispatch, wraps
 
-from sqlmodel import select
-
 from typing import Optional, Any, Type, TypeVar, Callable, ParamSpec
 
 from cryptography.fernet import Fernet
@@ -23,12 +31,10 @@ from uuid import UUID
 from rich.console import Console
 
 from app.config import TOKEN_KEY, API_NAME, VERSION, DEBUG, TOKEN_EXPIRE_MINUTES, TOKEN_REFRESH_EXPIRE_DAYS
-from app.models import Doctors, User
+from app.models import Doctors, User, verify_password, hash_password
 from app.db.session import session_factory
-from app.storage import storage
 from app.db.cache import redis_client as rc
 from app.core.interfaces.emails import EmailService
-from app.storage import storage
 from app.audit import (
     AuditAction,
     AuditEventCreate,
@@ -45,6 +51,83 @@ encoder_f = Fernet(encoder_key)
 
 console = Console()
 
+_LOGGER = logging.getLogger("app.core.auth")
+
+# Pool de procesos para bcrypt; lo crea y cierra el lifespan de la app. Se usa
+# forkserver (o spawn donde no existe) porque el proceso ya corre hilos y un
+# fork directo puede heredar locks tomados.
+_BCRYPT_POOL: Optional[ProcessPoolExecutor] = None
+_BCRYPT_POOL_LOCK = Lock()
+
+
+def start_bcrypt_pool() -> ProcessPoolExecutor:
+    """Devuelve el pool de bcrypt activo, creándolo si no existe."""
+    global _BCRYPT_POOL
+    with _BCRYPT_POOL_LOCK:
+        if _BCRYPT_POOL is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _BCRYPT_POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context(method),
+            )
+        return _BCRYPT_POOL
+
+
+def shutdown_bcrypt_pool() -> None:
+    """Cierra el pool activo; un `start_bcrypt_pool` posterior crea uno nuevo."""
+    global _BCRYPT_POOL
+    with _BCRYPT_POOL_LOCK:
+        pool, _BCRYPT_POOL = _BCRYPT_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# Payloads JWT ya verificados, indexados por el token crudo.
+_TOKEN_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+_TOKEN_CACHE_LOCK = Lock()
+
+# Vigencias de los tokens, calculadas una sola vez a partir de la configuración.
+_ACCESS_TOKEN_TTL = timedelta(minutes=TOKEN_EXPIRE_MINUTES)
+_REFRESH_TOKEN_TTL = timedelta(days=TOKEN_REFRESH_EXPIRE_DAYS)
+
+
+async def check_password(user: User | Doctors, raw_password: str) -> bool:
+    """
+    Verifica la contraseña de un usuario o médico fuera del event loop.
+
+    bcrypt es CPU-bound (~50-300 ms por verificación), por lo que se ejecuta
+    en un process pool para no bloquear el resto de requests.
+
+    Args:
+        user (User | Doctors): Entidad con el hash almacenado en `password`
+        raw_password (str): Contraseña en texto plano
+
+    Returns:
+        bool: True si la contraseña coincide con el hash
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(start_bcrypt_pool(), verify_password, raw_password, user.password)
+
+
+async def rehash_password(user: User | Doctors, raw_password: str) -> bool:
+    """
+    Re-hashea la contraseña si fue generada con un costo mayor a `BCRYPT_COST`.
+
+    Debe llamarse solo después de una verificación exitosa. El nuevo hash queda
+    en la entidad y se persiste con el commit del login.
+
+    Args:
+        user (User | Doctors): Entidad autenticada
+        raw_password (str): Contraseña en texto plano ya verificada
+
+    Returns:
+        bool: True si el hash fue reemplazado
+    """
+    if not user.password_needs_rehash():
+        return False
+    loop = asyncio.get_running_loop()
+    user.password = await loop.run_in_executor(start_bcrypt_pool(), hash_password, raw_password)
+    return True
+
 
 async def _emit_security_event(
     request: Request,
@@ -70,8 +153,7 @@ async def _emit_security_event(
     try:
         await emitter.emit_event(event)
     except Exception:  # pragma: no cover - defensive logging
-        if debug:
-            console.print_exception(show_locals=True)
+        _LOGGER.debug("Failed to emit security event %s", action, exc_info=True)
 
 
 @singledispatch
@@ -229,13 +311,14 @@ def gen_token(payload: dict, refresh: bool = False):
         - Incluye automáticamente iat (issued at) e iss (issuer)
         - Usa algoritmo HS256 con clave secreta del sistema
     """
-    payload.setdefault("iat", datetime.now())
+    now = datetime.now()
+    payload.setdefault("iat", now)
     payload.setdefault("iss", f"{API_NAME}/{VERSION}")
     if refresh:
-        payload["exp"] = int((datetime.now() + timedelta(days=TOKEN_REFRESH_EXPIRE_DAYS)).timestamp())
+        payload["exp"] = int((now + _REFRESH_TOKEN_TTL).timestamp())
         payload.setdefault("type", "refresh_token")
     else:
-        payload["exp"] = int((datetime.now() + timedelta(minutes=TOKEN_EXPIRE_MINUTES)).timestamp())
+        payload["exp"] = int((now + _ACCESS_TOKEN_TTL).timestamp())
     return jwt.encode(payload, TOKEN_KEY, algorithm="HS256")
 
 def decode_token(token: str):
@@ -258,14 +341,83 @@ def decode_token(token: str):
         - Usa leeway de 20 segundos para tolerancia de tiempo
         - Valida con la clave secreta del sistema
         - Solo acepta algoritmo HS256
+        - Cachea el payload por 5 segundos para no re-verificar la firma
+          en requests consecutivas con el mismo token
     """
+    with _TOKEN_CACHE_LOCK:
+        payload = _TOKEN_CACHE.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, key=TOKEN_KEY, algorithms=["HS256"], leeway=20)
-        return payload
     except PyJWTError as e:
-        print(e) if DEBUG else None
+        _LOGGER.debug("JWT rejected: %s", e)
         raise ValueError("Value Not Found") from e
 
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE[token] = payload
+    return payload
+
+async def decode_token_async(token: str) -> dict:
+    """
+    Variante async de `decode_token` para handlers y dependencies.
+
+    Los hits del cache se resuelven en el event loop; solo los misses
+    (verificación HMAC + parseo) se ejecutan en un thread.
+    """
+    with _TOKEN_CACHE_LOCK:
+        payload = _TOKEN_CACHE.get(token)
+    if payload is not None:
+        return payload
+    return await asyncio.to_thread(decode_token, token)
+
+def invalidate_token(token: str) -> None:
+    """Elimina un token del cache de `decode_token` (p. ej. al hacer logout)."""
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE.pop(token, None)
+
+def _ban_key(user_id: UUID | str, token: str) -> str:
+    """Clave Redis `ban:{user_id}:{digest}` de un token revocado."""
+    return f"ban:{user_id}:{hashlib.blake2b(token.encode(), digest_size=16).hexdigest()}"
+
+def _token_exp(token: str, fallback: int) -> int:
+    """Devuelve el `exp` (unix) del token sin verificar la firma, o `fallback`."""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except PyJWTError:
+        return fallback
+    return int(exp) if isinstance(exp, (int, float)) else fallback
+
+def ban_tokens(user_id: UUID | str, *tokens: str, ttl: int = TOKEN_REFRESH_EXPIRE_DAYS * 24 * 60 * 60) -> None:
+    """
+    Revoca tokens guardando una clave `ban:{user_id}:{digest}` por token.
+
+    Cada clave expira (`EXPIREAT`) junto con el `exp` del propio token, por
+    lo que Redis descarta sola las revocaciones que ya no sirven y la lista
+    de un usuario nunca crece sin límite. Todas las escrituras viajan en un
+    único pipeline.
+
+    Args:
+        user_id (UUID | str): Dueño de los tokens
+        *tokens (str): Tokens JWT a invalidar
+        ttl (int): Segundos de vida si el token no trae `exp` legible
+    """
+    tokens = tuple(t for t in tokens if t)
+    if not tokens:
+        return
+    fallback = int(time.time()) + ttl
+    with rc.pipeline(transaction=False) as pipe:
+        for token in tokens:
+            pipe.set(_ban_key(user_id, token), 1, exat=_token_exp(token, fallback))
+        pipe.execute()
+    for token in tokens:
+        invalidate_token(token)
+
+def is_token_banned(user_id: UUID | str, token: str) -> bool:
+    """Indica si existe la clave de revocación `ban:{user_id}:{digest}` del token."""
+    return bool(rc.exists(_ban_key(user_id, token)))
+
 P = ParamSpec("P")
 R = TypeVar("R")
 
@@ -418,7 +570,7 @@ class JWTBearer:
         token = session if session else authorization.replace("Bearer ", "")
 
         try:
-            payload = decode_token(token)
+            payload = await decode_token_async(token)
         except ValueError as e:
             await _emit_security_event(
                 request,
@@ -441,23 +593,15 @@ class JWTBearer:
 
         user_id = payload.get("sub")
 
-        ban_token_raw = rc.get(f"ban-token:{payload.get('sub')}")
-
-            #console.print(">>> ", ban_token, " <<<") if DEBUG else None
-
-        if ban_token_raw is not None:
-            if token == ban_token_raw:
-                raise HTTPException(status_code=403, detail="Token banned")
+        if is_token_banned(user_id, token):
+            raise HTTPException(status_code=403, detail="Token banned")
 
         try:
             # Determinar si es doctor o usuario
-            statement = select(User).where(User.id == user_id)
-
-            if "doc" in payload.get("scopes", []):
-                statement = select(Doctors).where(Doctors.id == user_id)
+            model = Doctors if "doc" in payload.get("scopes", []) else User
 
             with session_factory() as session:
-                user = session.exec(statement).first()
+                user = session.get(model, UUID(user_id))
 
             if not user:
                 await _emit_security_event(
@@ -488,46 +632,36 @@ class JWTBearer:
             # Re-raise HTTPExceptions sin modificar
             raise
         except Exception as e:
-            console.print(e) if DEBUG else None
+            _LOGGER.debug("JWT authentication failed: %s", e)
             raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 class JWTWebSocket:
     async def __call__(self, websocket: WebSocket) -> tuple[User | Doctors, list[str]] | tuple[None, None] | None:
         query = websocket.query_params
 
-        #console.print(query)
-
         if not "token" in query.keys() or query.get("token") is None:
-            #console.print(f"query: {query}")
             await websocket.close(1008, reason="No credentials provided or invalid format")
             return None
 
         if not query.get("token").startswith("Bearer_"):
-            #console.print(f"query: {query}")
             await websocket.close(1008, reason="No credentials provided or invalid format")
             return None
 
         token = query.get("token").split("_")[1]
-        #console.print(f"Tokwn jwt websocket: {token}")
 
         try:
-            payload = decode_token(token)
-            #console.print(f"Payload token: {payload}")
+            payload = await decode_token_async(token)
 
             user_id = payload.get("sub")
 
             if user_id is None:
-                #console.print("user id: ", user_id)
                 await websocket.close(1008, reason="Invalid token payload")
                 return None
 
-            statement = select(User).where(User.id == user_id)
-
-            if "doc" in payload.get("scopes"):
-                statement = select(Doctors).where(Doctors.id == user_id)
+            model = Doctors if "doc" in payload.get("scopes") else User
 
             with session_factory() as session:
-                user = session.exec(statement).first()
+                user = session.get(model, UUID(user_id))
 
             if "google" in payload.get("scopes") and not "doc" in payload.get("scopes"):
                 EmailService.send_warning_google_account(
@@ -541,6 +675,6 @@ class JWTWebSocket:
             return user, payload.get("scopes")
 
         except ValueError:
-            console.print_exception(show_locals=True)
+            _LOGGER.debug("WebSocket token rejected", exc_info=True)
             await websocket.close(1008, reason="Invalid o Expired Token")
             return None
@@ -34,7 +34,7 @@ class DoctorRepository(BaseInterface):
     
     @staticmethod
     async def get_doctor_by_id(session: Session, doctor_id: UUID) -> Doctors:
-        return session.exec(select(Doctors).where(Doctors.id == doctor_id)).first()
+        return session.get(Doctors, doctor_id)
     
     @staticmethod
     async def get_available_doctors(session: Session) -> list[Doctors]:
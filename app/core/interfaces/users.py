@@ -1,5 +1,6 @@
 from typing import Tuple
 
+from sqlalchemy import bindparam
 from sqlmodel import Session, select
 
 from app.db.session import session_factory
@@ -9,6 +10,10 @@ from app.storage.command.main import console
 from app.core.utils import BaseInterface
 
 
+# Sentencia construida una sola vez; el email viaja como parámetro enlazado.
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email")).limit(1)
+
+
 class EmailHasNotBeenVerified(Exception):
     def __init__(self, message: str = "Email has not been verified."):
         self.message = message
@@ -0,0 +1,23 @@
+"""Middlewares ASGI compartidos por la aplicación."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+
+class RequestClockMiddleware:
+    """
+    Middleware ASGI que fija la hora del request una sola vez.
+
+    Expone `request.state.now` (UTC, con zona horaria) para que los handlers
+    usen un único timestamp consistente en lugar de llamar a `datetime.now()`
+    varias veces.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            scope.setdefault("state", {})["now"] = datetime.now(timezone.utc)
+        await self.app(scope, receive, send)
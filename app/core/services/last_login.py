@@ -0,0 +1,113 @@
+"""Write-behind worker that batches `last_login` updates out of the login path."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import case, update
+
+from app.config import LAST_LOGIN_BATCH_SIZE, LAST_LOGIN_LINGER_SECONDS, LAST_LOGIN_QUEUE_SIZE
+from app.db.session import SessionFactory, session_factory
+from app.models import Doctors, User
+
+_LOGGER = logging.getLogger("app.core.services.last_login")
+
+LastLoginEntry = tuple[type[User] | type[Doctors], UUID, datetime]
+
+
+class LastLoginWriter:
+    """Background worker that flushes `last_login` timestamps in batches.
+
+    Each flush issues one `UPDATE ... SET last_login = CASE id ... WHERE id IN (...)`
+    per model, so N logins inside the linger window cost a single commit.
+    """
+
+    def __init__(
+        self,
+        factory: SessionFactory,
+        *,
+        max_queue_size: int = 10_000,
+        batch_size: int = 1000,
+        linger_seconds: float = 0.5,
+    ):
+        self._factory = factory
+        self._queue: asyncio.Queue[LastLoginEntry] = asyncio.Queue(maxsize=max_queue_size)
+        self._batch_size = batch_size
+        self._linger_seconds = linger_seconds
+        self._shutdown = asyncio.Event()
+        self._worker: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        if self._worker and not self._worker.done():
+            return
+        self._shutdown.clear()
+        self._worker = asyncio.create_task(self._run(), name="last-login-writer")
+
+    async def stop(self) -> None:
+        if not self._worker:
+            return
+        self._shutdown.set()
+        await self._worker
+        self._worker = None
+
+    async def enqueue(self, entity: User | Doctors) -> None:
+        """Queue the entity's current `last_login` for persistence."""
+
+        entry: LastLoginEntry = (type(entity), entity.id, entity.last_login)
+        if not self._worker or self._worker.done():
+            await asyncio.to_thread(self.persist, [entry])
+            return
+
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            _LOGGER.warning("last_login queue full; persisting synchronously.")
+            await asyncio.to_thread(self.persist, [entry])
+
+    def persist(self, entries: list[LastLoginEntry]) -> None:
+        latest: dict[type[User] | type[Doctors], dict[UUID, datetime]] = {}
+        for model, entity_id, timestamp in entries:
+            by_id = latest.setdefault(model, {})
+            current = by_id.get(entity_id)
+            if current is None or timestamp > current:
+                by_id[entity_id] = timestamp
+
+        with self._factory() as session:
+            for model, by_id in latest.items():
+                session.execute(
+                    update(model)
+                    .where(model.id.in_(by_id.keys()))
+                    .values(last_login=case(by_id, value=model.id))
+                )
+            session.commit()
+
+    async def _run(self) -> None:
+        while not (self._shutdown.is_set() and self._queue.empty()):
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self._linger_seconds)
+            except asyncio.TimeoutError:
+                continue
+
+            if not self._shutdown.is_set():
+                await asyncio.sleep(self._linger_seconds)
+
+            pending = [first]
+            while len(pending) < self._batch_size and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+
+            try:
+                await asyncio.to_thread(self.persist, pending)
+            except Exception:  # pragma: no cover - defensive logging
+                _LOGGER.exception("Failed to persist %s last_login updates.", len(pending))
+
+
+last_login_writer = LastLoginWriter(
+    session_factory,
+    max_queue_size=LAST_LOGIN_QUEUE_SIZE,
+    batch_size=LAST_LOGIN_BATCH_SIZE,
+    linger_seconds=LAST_LOGIN_LINGER_SECONDS,
+)
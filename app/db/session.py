@@ -5,14 +5,23 @@ from __future__ import annotations
 from collections.abc import Iterator
 from typing import Callable
 
+from sqlalchemy.engine import make_url
 from sqlmodel import Session, create_engine
 
-from app.config import DB_URL
+from app.config import DB_MAX_OVERFLOW, DB_POOL_SIZE, DB_URL
 
 if not DB_URL:
     raise RuntimeError("Database URL is not configured.")
 
-engine = create_engine(DB_URL, echo=False, future=True, pool_pre_ping=True)
+# Los handlers síncronos corren en el threadpool de AnyIO (40 hilos por defecto);
+# el pool debe acompañar esa concurrencia para no bloquearse esperando conexiones.
+_pool_options = (
+    {}
+    if make_url(DB_URL).get_backend_name() == "sqlite"
+    else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+)
+
+engine = create_engine(DB_URL, echo=False, future=True, pool_pre_ping=True, **_pool_options)
 
 SessionFactory = Callable[[], Session]
 
@@ -45,7 +45,9 @@ from app.config import (
     MEDIA_DIR,
 )
 from app.storage.main import storage
-from app.core.auth import time_out, gen_token, decode_token
+from app.core.auth import time_out, gen_token, decode_token_async, start_bcrypt_pool, shutdown_bcrypt_pool
+from app.core.services.last_login import last_login_writer
+from app.core.middleware import RequestClockMiddleware
 
 install(show_locals=True)
 
@@ -106,7 +108,6 @@ async def lifespan(app: FastAPI):
     
     # Crear todas las tablas necesarias
     required_tables = [
-        "ban-token",
         "google-user-data", 
         "recovery-codes",
         "ip-time-out"
@@ -125,6 +126,8 @@ async def lifespan(app: FastAPI):
     
     if AUDIT_ENABLED:
         await audit_pipeline.start()
+    await last_login_writer.start()
+    start_bcrypt_pool()
         
     console.rule("[green]Server Opened[/green]")
     if DEBUG:
@@ -149,6 +152,8 @@ async def lifespan(app: FastAPI):
     finally:
         if AUDIT_ENABLED:
             await audit_pipeline.stop()
+        await last_login_writer.stop()
+        shutdown_bcrypt_pool()
         console.rule("[red]Server Closed[/red]")
         yield None
         console.rule("[red]Server Closed[/red]")
@@ -284,6 +289,7 @@ if AUDIT_ENABLED:
 main_router.include_router(ai_assistant.router)
 
 app.include_router(main_router)
+app.add_middleware(RequestClockMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -428,7 +434,7 @@ async def login_admin(request: Request):
 async def admin(request: Request):
     session = request.cookies.get("session")
     try:
-        decode_token(session)
+        await decode_token_async(session)
         return TEMPLATES.TemplateResponse(parser_name(["admin", "panel"], "index"), {"request": request})
     except Exception as e:
         console.print_exception(show_locals=True)
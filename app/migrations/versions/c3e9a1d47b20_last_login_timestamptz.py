@@ -0,0 +1,59 @@
+"""store last_login and date_joined as timestamptz
+
+Revision ID: c3e9a1d47b20
+Revises: bb1b6f3d5b89
+Create Date: 2026-10-15 00:00:00.000000
+
+Existing values were written with naive `datetime.now()` on the API host. The
+conversion assumes that host runs in `TIME_ZONE` (the same setting `app.config`
+reads) and interprets them as local times in that zone. It does not use the
+database session time zone.
+
+"""
+import os
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a1d47b20'
+down_revision: Union[str, None] = 'bb1b6f3d5b89'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TIME_ZONE = str(ZoneInfo(os.getenv("TIME_ZONE", "America/Argentina/Buenos_Aires")))
+_COLUMNS = (
+    ('users', 'last_login', True),
+    ('users', 'date_joined', False),
+    ('doctors', 'last_login', True),
+    ('doctors', 'date_joined', False),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, nullable in _COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(),
+            type_=sa.DateTime(timezone=True),
+            existing_nullable=nullable,
+            postgresql_using=f"{column} AT TIME ZONE '{_TIME_ZONE}'",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, nullable in _COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(timezone=True),
+            type_=sa.DateTime(),
+            existing_nullable=nullable,
+            postgresql_using=f"{column} AT TIME ZONE '{_TIME_ZONE}'",
+        )
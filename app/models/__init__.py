@@ -3,7 +3,7 @@ from pathlib import Path
 from fastapi import UploadFile
 from sqlmodel import SQLModel, Field, Relationship, Session
 
-from sqlalchemy import Column, JSON, UUID as UUID_TYPE, VARCHAR, event
+from sqlalchemy import Column, DateTime, JSON, UUID as UUID_TYPE, VARCHAR, event
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.orm import declarative_mixin, relationship
 
@@ -16,7 +16,7 @@ from passlib.context import CryptContext
 import uuid
 from uuid import UUID, uuid4
 
-from datetime import time, datetime, timedelta
+from datetime import time, datetime, timedelta, timezone
 from datetime import date as date_type, time as time_type
 
 from enum import Enum
@@ -25,13 +25,34 @@ import re
 
 import random
 
+import asyncio
+
 import os
 from dotenv import load_dotenv
 from app.models.payment import Payment, PaymentItem, PaymentMethod, PaymentStatus
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_COST: int = int(os.getenv("BCRYPT_COST", 10))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_COST)
+
+_BCRYPT_COST_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+def verify_password(raw_password: str, hashed_password: str) -> bool:
+    """Verifica un hash bcrypt. Es top-level para poder enviarse a un process pool."""
+    return pwd_context.verify(raw_password, hashed_password)
+
+
+def hash_password(raw_password: str) -> str:
+    """Genera un hash bcrypt con el costo `BCRYPT_COST`. Top-level por el mismo motivo."""
+    return pwd_context.hash(raw_password)
+
+
+def _utcnow() -> datetime:
+    """Timestamp UTC con zona horaria, para no mezclar valores naive y aware."""
+    return datetime.now(timezone.utc)
 
 class DoctorStates(str, Enum):
     available = "available",
@@ -97,8 +118,8 @@ class BaseUser(SQLModel, table=False):
     is_active: bool = Field(default=True)
     is_admin: bool = Field(default=False)
     is_superuser: bool = Field(default=False)
-    last_login: Optional[datetime] = Field(nullable=True)
-    date_joined: datetime = Field(default_factory=datetime.now)
+    last_login: Optional[datetime] = Field(sa_type=DateTime(timezone=True), nullable=True)
+    date_joined: datetime = Field(default_factory=_utcnow, sa_type=DateTime(timezone=True))
     updated_at: datetime = Field(default=datetime.now(), nullable=True)
     dni: str = Field(max_length=8)
     telephone: Optional[str] = Field(max_length=50)
@@ -118,7 +139,14 @@ class BaseUser(SQLModel, table=False):
     async def save_profile_image(self, file: UploadFile | None, media_root: str = "media"):
         if file is None:
             return
-        
+
+        content = await file.read()
+        ext = file.filename.split(".")[-1]
+        unique_name = await asyncio.to_thread(self._write_profile_image, content, ext, media_root)
+
+        self.set_url_image_profile(unique_name)
+
+    def _write_profile_image(self, content: bytes, ext: str, media_root: str) -> str:
         cls_name = self.__class__.__name__.lower()
         
         try:
@@ -134,15 +162,13 @@ class BaseUser(SQLModel, table=False):
         folder_path = Path(media_root) / cls_name
         folder_path.mkdir(parents=True, exist_ok=True)
 
-        ext = file.filename.split(".")[-1]
         unique_name = f"{uuid4().hex}.{ext}"
         file_path = folder_path / unique_name
 
         with open(file_path, "wb") as f:
-            content = await file.read()
             f.write(content)
 
-        self.set_url_image_profile(unique_name)
+        return unique_name
 
     def set_password(self, raw_password: str):
         """
@@ -163,11 +189,16 @@ class BaseUser(SQLModel, table=False):
         if re.match(pattern, raw_password) is None:
             raise PasswordError(message=f"value: {raw_password} does not match the required pattern")
 
-        self.password = pwd_context.hash(raw_password)
+        self.password = hash_password(raw_password)
 
     def check_password(self, raw_password: str) -> bool:
         """Verifica la contraseña en texto plano contra el hash almacenado."""
-        return pwd_context.verify(raw_password, self.password)
+        return verify_password(raw_password, self.password)
+
+    def password_needs_rehash(self) -> bool:
+        """Indica si el hash almacenado usa un costo bcrypt mayor a `BCRYPT_COST`."""
+        match = _BCRYPT_COST_PATTERN.match(self.password or "")
+        return match is not None and int(match.group(1)) > BCRYPT_COST
 
     def _make_audit_record(
         self,
@@ -180,7 +211,7 @@ class BaseUser(SQLModel, table=False):
             target_type=self.__class__.__name__,
             target_id=getattr(self, "id", None),
             actor_id=actor_id,
-            timestamp=datetime.now(),
+            timestamp=_utcnow(),
             details=details or {},
         )
 
@@ -193,7 +224,7 @@ class BaseUser(SQLModel, table=False):
         if not self.is_active:
             raise ValueError("Inactive accounts cannot start a new session.")
 
-        timestamp = timestamp or datetime.now()
+        timestamp = timestamp or _utcnow()
         self.last_login = timestamp
         return self._make_audit_record(
             action="mark_login",
@@ -139,16 +139,22 @@ __all__ = [
     "TurnsUpdate",
 ]
 
-LocationResponse.model_rebuild()
-DepartmentResponse.model_rebuild()
-SpecialtyResponse.model_rebuild()
-ServiceResponse.model_rebuild()
-DoctorResponse.model_rebuild()
-MedicalScheduleResponse.model_rebuild()
-ChatResponse.model_rebuild()
-MessageResponse.model_rebuild()
-TurnsResponse.model_rebuild()
-AppointmentResponse.model_rebuild()
-HealthInsuranceRead.model_rebuild()
-TurnDocumentSummary.model_rebuild()
-TurnDocumentDownloadLog.model_rebuild()
+# Solo los DTO con referencias adelantadas (directas o anidadas) entre módulos
+# necesitan resolverse aquí, donde todos los nombres ya están importados.
+for _model in (
+    LocationResponse,
+    DepartmentResponse,
+    SpecialtyResponse,
+    ServiceResponse,
+    DoctorResponse,
+    MedicalScheduleResponse,
+    ChatResponse,
+    MessageResponse,
+    TurnsResponse,
+    AppointmentResponse,
+    PayTurnResponse,
+    TurnDocumentSummary,
+    TurnDocumentDownloadLog,
+):
+    _model.model_rebuild()
+del _model
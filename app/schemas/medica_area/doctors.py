@@ -4,7 +4,9 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, constr, field_validator
+from pydantic import BaseModel, EmailStr, field_validator
+
+from app.schemas.users import Dni, Password
 
 
 class DoctorBase(BaseModel):
@@ -12,7 +14,7 @@ class DoctorBase(BaseModel):
     email: EmailStr
     first_name: Optional[str] = None
     last_name: Optional[str] = None
-    dni: constr(min_length=8)
+    dni: Dni
     telephone: Optional[str] = None
     speciality_id: UUID
     address: Optional[str] = None
@@ -21,7 +23,7 @@ class DoctorBase(BaseModel):
 
 
 class DoctorCreate(DoctorBase):
-    password: constr(min_length=8)
+    password: Password
 
 
 class DoctorUpdate(BaseModel):
@@ -42,7 +44,7 @@ class DoctorUpdate(BaseModel):
 
 
 class DoctorPasswordUpdate(BaseModel):
-    password: constr(min_length=8)
+    password: Password
 
 
 class DoctorSpecialityUpdate(BaseModel):
@@ -67,7 +69,7 @@ class DoctorDelete(BaseModel):
 
 class DoctorAuth(BaseModel):
     email: EmailStr
-    password: constr(min_length=8)
+    password: Password
 
     @classmethod
     @field_validator("email", mode="before")
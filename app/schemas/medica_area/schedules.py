@@ -4,7 +4,7 @@ from datetime import time as time_type
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, model_validator
 
 from .enums import DayOfWeek
 
@@ -24,35 +24,11 @@ class MedicalScheduleUpdate(BaseModel):
     start_time: Optional[time_type] = None
     end_time: Optional[time_type] = None
 
-    @classmethod
-    @field_validator("start_time", mode="before")
-    def validate_day(cls, value: time_type):
-        if value.hour < 0 or value.hour > 23:
-            raise ValueError("El valor de start_time debe estar entre 0 y 23.")
-        if value.minute < 0 or value.minute > 59:
-            raise ValueError("El valor de start_time debe estar entre 0 y 59.")
-        if value.second < 0 or value.second > 59:
-            raise ValueError("El valor de start_time debe estar entre 0 y 59.")
-
-        if value > cls.end_time:
+    @model_validator(mode="after")
+    def validate_times(self):
+        if self.start_time is not None and self.end_time is not None and self.start_time >= self.end_time:
             raise ValueError("El valor de start_time debe ser menor que end_time.")
-
-        return value
-
-    @classmethod
-    @field_validator("start_time", mode="before")
-    def validate_day(cls, value: time_type):
-        if value.hour < 0 or value.hour > 23:
-            raise ValueError("El valor de start_time debe estar entre 0 y 23.")
-        if value.minute < 0 or value.minute > 59:
-            raise ValueError("El valor de start_time debe estar entre 0 y 59.")
-        if value.second < 0 or value.second > 59:
-            raise ValueError("El valor de start_time debe estar entre 0 y 59.")
-
-        if value < cls.start_time:
-            raise ValueError("El valor de end_time debe ser mayor que start_time.")
-
-        return value
+        return self
 
 
 class MedicalScheduleResponse(MedicalScheduleBase):
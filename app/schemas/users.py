@@ -2,19 +2,24 @@ from datetime import datetime
 
 from fastapi import UploadFile
 
-from typing import Optional, List
+from typing import Annotated, Optional, List
 
-from pydantic import BaseModel, EmailStr, PrivateAttr, constr, field_validator, model_validator
+from pydantic import BaseModel, EmailStr, PrivateAttr, StringConstraints, field_validator, model_validator
 
 from uuid import UUID
 
 
+# Tipos restringidos compartidos: se definen una vez y se reutilizan en cada campo.
+Password = Annotated[str, StringConstraints(min_length=8)]
+Dni = Annotated[str, StringConstraints(min_length=8)]
+
+
 class UserBase(BaseModel):
     username: str
     email: EmailStr
     first_name: Optional[str] = None
     last_name: Optional[str] = None
-    dni: constr(min_length=8)
+    dni: Dni
     telephone: Optional[str] = None
     address: Optional[str] = None
     blood_type: Optional[str] = None
@@ -28,7 +33,7 @@ class UserBase(BaseModel):
         return v
 
 class UserCreate(UserBase):
-    password: constr(min_length=8)
+    password: Password
     img_profile: Optional[UploadFile] = None
 
 class UserRead(UserBase):
@@ -40,6 +45,38 @@ class UserRead(UserBase):
     date_joined: datetime
     img_profile: Optional[str]
 
+    @classmethod
+    def from_user(cls, user, *, with_health_insurance: bool = False) -> "UserRead":
+        """
+        Construye el DTO desde una entidad `User` persistida, sin revalidar.
+
+        Args:
+            user (User): Usuario leído de la base
+            with_health_insurance (bool): Incluir los ids de seguros médicos
+                (requiere la relación cargada)
+
+        Returns:
+            UserRead: DTO armado con `model_construct`
+        """
+        return cls.model_construct(
+            id=user.id,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            is_superuser=user.is_superuser,
+            last_login=user.last_login,
+            date_joined=user.date_joined,
+            username=user.name,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            dni=user.dni,
+            telephone=user.telephone,
+            address=user.address,
+            blood_type=user.blood_type,
+            img_profile=user.url_image_profile,
+            health_insurance=[h.id for h in user.health_insurance] if with_health_insurance else [],
+        )
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     first_name: Optional[str] = None
@@ -53,9 +90,9 @@ class UserHeathInsuranceUpdate(BaseModel):
     heath_insurance_id: Optional[List[UUID]] = []
 
 class UserPasswordUpdate(BaseModel):
-    old_password: constr(min_length=8)
-    new_password: constr(min_length=8)
-    new_password_confirm: Optional[constr(min_length=8)] = None
+    old_password: Password
+    new_password: Password
+    new_password_confirm: Optional[Password] = None
     _confirmation_matches: bool = PrivateAttr(default=True)
 
     @model_validator(mode="after")
@@ -81,7 +118,7 @@ class UserDelete(UserBase):
 
 class UserAuth(BaseModel):
     email: EmailStr
-    password: constr(min_length=8)
+    password: Password
     
 class DniForm(BaseModel):
     front: UploadFile
@@ -97,5 +134,5 @@ class VerifyResetOut(BaseModel):
 
 class ConfirmResetIn(BaseModel):
     reset_session_id: UUID
-    new_password: constr(min_length=8)
-    new_password_confirm: constr(min_length=8)    
\ No newline at end of file
+    new_password: Password
+    new_password_confirm: Password    
\ No newline at end of file
@@ -1 +1,4 @@
-from .main import storage, NoneResultException
\ No newline at end of file
+from .main import storage
+from .singleton_class import NoneResultException
+
+__all__ = ["storage", "NoneResultException"]
@@ -1,27 +1,42 @@
 from pydantic import BaseModel
 from typing import Optional, Any, Dict, List
 
-from uuid import UUID, uuid4
+from uuid import UUID
 
 from functools import wraps
 
-from datetime import datetime, timedelta
+from dataclasses import dataclass
 
-from time import time
+from datetime import datetime, timedelta, timezone
+
+from time import perf_counter
 
 from pathlib import Path
 
 import json
 
+import orjson
+
 import os
 
-from app.config import STORAGE_DIR_NAME, GET_CURRENT_TIME, console
+import heapq
+
+import logging
+
+from threading import Event, Lock, Thread
+
+from app.config import STORAGE_DIR_NAME
 
 os.environ["PATH_DIR"] = str(Path(__file__).parent / STORAGE_DIR_NAME)
 Path(os.environ["PATH_DIR"]).mkdir(parents=True, exist_ok=True)
 
 import encript_storage as es
 
+_LOGGER = logging.getLogger("app.storage")
+
+_ITEM_TTL = timedelta(days=30)
+_SWEEP_INTERVAL_SECONDS = 60
+
 class NoneResultException(Exception):
     def __init__(self, message: str = "Result is None"):
         self.message = message
@@ -30,20 +45,57 @@ class NoneResultException(Exception):
 def timeit(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time()
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+        start = perf_counter()
         result = func(*args, **kwargs)
-        end = time()
-        print(f"Function {func.__name__!r} executed in {(end-start):.4f}s")
+        _LOGGER.debug("Function %r executed in %.4fs", func.__name__, perf_counter() - start)
         return result
     return wrapper
 
 
-def date_encoder(o):
-    if isinstance(o, datetime):
-        return o.isoformat()
-    if isinstance(o, UUID):
-        return str(o)
-    return o
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """Normaliza un sello del set cifrado a un datetime aware en UTC; los ISO sin offset se asumen UTC."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        try:
+            return datetime.fromtimestamp(float(value), tz=timezone.utc)
+        except ValueError:
+            parsed = datetime.fromisoformat(value)
+            if parsed.tzinfo is None:
+                return parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc)
+    return None
+
+
+def _deadline(created: Optional[datetime]) -> Optional[datetime]:
+    """Momento en que vence un item: `created` + TTL. El `expired_at` de la extensión solo se informa."""
+    return created + _ITEM_TTL if created is not None else None
+
+
+def _is_expired(created: Optional[datetime], now: datetime) -> bool:
+    if created is None:
+        return True
+    return _deadline(created) <= now
+
+def _indexed_value(payload: Any, parameter: str) -> Any:
+    return payload.get(parameter, None) if isinstance(payload, dict) else payload
+
+
+def _index_token(data: Any) -> Optional[tuple[type, Any]]:
+    """Clave de índice que respeta la igualdad por tipo de `get_by_parameter` (1 != True)."""
+    if data is None:
+        return None
+    try:
+        hash(data)
+    except TypeError:
+        return None
+    return (type(data), data)
 
 class Response(BaseModel):
     key: str
@@ -57,11 +109,29 @@ class GetItem(BaseModel):
     key: str
     value: Optional[Response] = None
 
-class SetItem(Response):
-    key: Optional[str] = None
 
-class Storage(BaseModel):
-    tables: Dict[str, Dict[str, Any]] = {}
+@dataclass(slots=True)
+class _Entry:
+    """Item en memoria de una tabla; se convierte a `GetItem` solo al leerse."""
+    key: str
+    value: Any
+    created: Optional[datetime] = None
+    updated: Optional[datetime] = None
+    expired: Optional[datetime] = None
+    id: Optional[UUID] = None
+
+    def to_item(self) -> GetItem:
+        return GetItem.model_construct(
+            key=self.key,
+            value=Response.model_construct(
+                key=self.key,
+                value=self.value,
+                expired=self.expired,
+                created=self.created,
+                updated=self.updated,
+                id=self.id,
+            ),
+        )
 
 
 class Singleton:
@@ -78,256 +148,269 @@ class Singleton:
             set_obj: es.Set = es.py_read_set(table_name)
         except Exception:
             return
-        now = GET_CURRENT_TIME()
-        ttl = timedelta(days=30)
-        tz = now.tzinfo
-        try:
-            items = set_obj.items()
-            original_len = 0
-            filtered_items = []
-            for it in items:
-                original_len += 1
-                ca = getattr(it, "created_at", None)
-                created = None
-                if isinstance(ca, (int, float)):
-                    try:
-                        created = datetime.fromtimestamp(float(ca), tz=tz)
-                    except Exception:
-                        created = None
-                elif isinstance(ca, str):
-                    try:
-                        created = datetime.fromtimestamp(float(ca), tz=tz)
-                    except Exception:
-                        created = None
-                if created and (created + ttl) > now:
-                    filtered_items.append(json.loads(it.to_json()))
-            if len(filtered_items) != original_len:
-                new_set = {"name": set_obj.name, "content": filtered_items}
-                es.py_save_data(table_name, json.dumps(new_set, default=date_encoder))
-        except Exception:
-            set_dict = json.loads(set_obj.to_json())
-            content = set_dict.get("content", [])
-            original_len = len(content) if isinstance(content, list) else 0
-            filtered = []
-            for it in set_dict.get("content", []):
-                ca = it.get("created_at")
-                created = None
-                if isinstance(ca, (int, float)):
-                    try:
-                        created = datetime.fromtimestamp(float(ca), tz=tz)
-                    except Exception:
-                        created = None
-                elif isinstance(ca, str):
-                    try:
-                        created = datetime.fromtimestamp(float(ca), tz=tz)
-                    except Exception:
-                        created = None
-                if created and (created + ttl) > now:
-                    filtered.append(it)
-            if len(filtered) != original_len:
-                set_dict["content"] = filtered
-                es.py_save_data(table_name, orjson.dumps(set_dict, default=date_encoder).decode())
+        now = _now()
+        items = set_obj.items()
+        removed = {
+            it.item_name for it in items
+            if _is_expired(_timestamp(it.created_at), now)
+        }
+        if not removed:
+            return
+        kept = [orjson.loads(it.to_json()) for it in items if it.item_name not in removed]
+        es.py_save_data(table_name, orjson.dumps({"name": set_obj.name, "content": kept}).decode())
+        table = self._tables.get(table_name)
+        if table is not None:
+            with self._lock:
+                for key in removed:
+                    table.pop(key, None)
 
     def __init_storage(self):
-        self.data = Storage(tables={})
-
-    def _load(self):
-        return None
-
-
-    def _auto_flush(self):
-        return None
-
-    
+        self._tables: Dict[str, Dict[str, _Entry]] = {}
+        # Índices secundarios de `get_by_parameter`: tabla -> parámetro -> valor -> key.
+        self._indexes: Dict[str, Dict[str, Dict[tuple[type, Any], str]]] = {}
+        self._lock = Lock()
+        self._expiry_heap: List[tuple[datetime, str, str]] = []
+        self._sweep_wakeup = Event()
+        Thread(target=self._sweep_loop, name="storage-sweeper", daemon=True).start()
+
+    def _track_expiry(self, table_name: str, entry: _Entry) -> None:
+        deadline = _deadline(entry.created)
+        if deadline is not None:
+            was_empty = not self._expiry_heap
+            heapq.heappush(self._expiry_heap, (deadline, table_name, entry.key))
+            if was_empty:
+                self._sweep_wakeup.set()
+
+    def _next_sweep_timeout(self) -> Optional[float]:
+        """Segundos hasta el próximo vencimiento, nunca menos que el intervalo mínimo; None si no hay claves."""
+        with self._lock:
+            if not self._expiry_heap:
+                return None
+            remaining = (self._expiry_heap[0][0] - _now()).total_seconds()
+        return max(remaining, _SWEEP_INTERVAL_SECONDS)
+
+    def _sweep_loop(self) -> None:
+        # Duerme hasta el vencimiento más próximo en lugar de despertar cada
+        # intervalo; el piso de `_SWEEP_INTERVAL_SECONDS` agrupa vencimientos
+        # cercanos en una sola purga.
+        while True:
+            self._sweep_wakeup.wait(self._next_sweep_timeout())
+            self._sweep_wakeup.clear()
+            try:
+                self.sweep_expired()
+            except Exception:
+                _LOGGER.exception("Storage expiry sweep failed")
+
+    def sweep_expired(self) -> None:
+        """Purga solo las tablas con claves vencidas, según el heap de expiraciones."""
+        now = _now()
+        due: set[str] = set()
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, table_name, _ = heapq.heappop(self._expiry_heap)
+                due.add(table_name)
+        for table_name in due:
+            self.purge_expired(table_name)
+
+    @staticmethod
+    def _decode_content(content: Any) -> Any:
+        if isinstance(content, str):
+            try:
+                return orjson.loads(content)
+            except orjson.JSONDecodeError:
+                return content
+        return content
+
+    def _entry_from_item(self, item: es.Item) -> _Entry:
+        created = _timestamp(item.created_at)
+        # Un item recién creado trae el mismo sello en created/updated: se parsea una vez.
+        updated = created if item.updated_at == item.created_at else _timestamp(item.updated_at)
+        return _Entry(
+            key=item.item_name,
+            value=self._decode_content(item.content),
+            expired=_timestamp(item.expired_at),
+            created=created,
+            updated=updated,
+            id=UUID(item.uuid_id) if item.uuid_id else None,
+        )
 
-    def create_table(self, table_name: str):
+    def _load(self, table_name: str) -> Dict[str, _Entry] | None:
+        """Devuelve la tabla en memoria, leyéndola del set cifrado solo la primera vez."""
+        table = self._tables.get(table_name)
+        if table is not None:
+            return table
         try:
-            es.py_read_set(table_name)
-            return None
+            set_obj: es.Set = es.py_read_set(table_name)
         except Exception:
-            s = es.py_create_set(table_name)
-            es.py_save_data(table_name, s.to_json())
             return None
+        table = {}
+        for it in set_obj.items():
+            table[it.item_name] = self._entry_from_item(it)
+        with self._lock:
+            if table_name in self._tables:
+                return self._tables[table_name]
+            for entry in table.values():
+                self._track_expiry(table_name, entry)
+            self._tables[table_name] = table
+            return table
+
+    def reload(self, table_name: Optional[str] = None) -> None:
+        """
+        Descarta el espejo en memoria (de una tabla o de todas) para releerlo del set cifrado.
+
+        `get`, `get_by_parameter` y `set` lo llaman solos ante una key ausente,
+        porque otro worker o el CLI pudo haber escrito el item. Un acierto, en
+        cambio, puede servir un valor que otro proceso ya modificó.
+        """
+        with self._lock:
+            if table_name is None:
+                self._tables.clear()
+                self._indexes.clear()
+            else:
+                self._tables.pop(table_name, None)
+                self._indexes.pop(table_name, None)
+
+    def _build_index(self, table_name: str, table: Dict[str, _Entry], parameter: str) -> Dict[tuple[type, Any], str]:
+        """Arma el índice de `parameter` con las entradas vigentes; ante valores repetidos gana la primera."""
+        now = _now()
+        index: Dict[tuple[type, Any], str] = {}
+        for entry in list(table.values()):
+            if _is_expired(entry.created, now):
+                continue
+            token = _index_token(_indexed_value(entry.value, parameter))
+            if token is not None:
+                index.setdefault(token, entry.key)
+        with self._lock:
+            self._indexes.setdefault(table_name, {})[parameter] = index
+        return index
+
+    def _index_entry(self, table_name: str, entry: _Entry) -> None:
+        for parameter, index in self._indexes.get(table_name, {}).items():
+            token = _index_token(_indexed_value(entry.value, parameter))
+            if token is not None:
+                index.setdefault(token, entry.key)
+
+    def create_table(self, table_name: str):
+        if self._load(table_name) is not None:
+            return None
+        s = es.py_create_set(table_name)
+        es.py_save_data(table_name, s.to_json())
+        with self._lock:
+            self._tables.setdefault(table_name, {})
+        return None
 
     def _get_internal_all(self, table_name: str) -> List[GetItem] | None:
-        try:
-            set_obj: es.Set = es.py_read_set(table_name)
-        except Exception:
+        table = self._load(table_name)
+        if not table:
             return None
-        items_response: List[GetItem] = []
-        try:
-            for it in set_obj.items():
-                key = it.item_name
-                payload = it.content
-                if isinstance(payload, str):
-                    try:
-                        payload = orjson.loads(payload)
-                    except Exception:
-                        payload = {}
-                expired = it.expired_at
-                created = it.created_at
-                updated = it.updated_at
-                items_response.append(
-                    GetItem(
-                        key=key,
-                        value=Response(
-                            key=key,
-                            value=payload.get("value"),
-                            expired=datetime.fromisoformat(expired) if expired else None,
-                            created=datetime.fromisoformat(created) if created else None,
-                            updated=datetime.fromisoformat(updated) if updated else None,
-                            id=UUID(it.uuid_id),
-                        )
-                    )
-                )
-        except Exception:
-            set_dict = json.loads(set_obj.to_json())
-            content = set_dict.get("content", None)
-            if not content:
-                return None
-            for it in content:
-                key = it.item_name
-                payload = it.content
-                if isinstance(payload, str):
-                    try:
-                        payload = json.loads(payload)
-                    except Exception:
-                        payload = {}
-                created = it.created_at
-                updated = it.updated_at
-                expired = it.expired_at
-                items_response.append(
-                    GetItem(
-                        key=key,
-                        value=Response(
-                            key=key,
-                            value=payload.get("value"),
-                            expired=datetime.fromisoformat(expired) if expired else None,
-                            created=datetime.fromisoformat(created) if created else None,
-                            updated=datetime.fromisoformat(updated) if updated else None,
-                            id=UUID(it.uuid_id),
-                        )
-                    )
-                )
-        return items_response or None
+        now = _now()
+        return [
+            entry.to_item()
+            for entry in list(table.values())
+            if not _is_expired(entry.created, now)
+        ] or None
 
     def get_all(self, table_name: str = None) -> List[GetItem] | None:
         return self._get_internal_all(table_name=table_name)
 
-    def get(self, key: str, table_name: str) -> GetItem | None:
-        try:
-            item: es.Item = es.py_find_item_in_set(table_name, item_name=key)
-        except Exception:
+    def _live_entry(self, table_name: str, key: str) -> Optional[_Entry]:
+        table = self._load(table_name)
+        entry = table.get(key) if table is not None else None
+        if entry is None or _is_expired(entry.created, _now()):
             return None
-        payload = item.content
-        if isinstance(payload, str):
-            try:
-                payload = orjson.loads(payload)
-            except Exception:
-                payload = {}
-        created = payload.get("created")
-        updated = payload.get("updated")
-        expired = payload.get("expired")
-        return GetItem(
-            key=item.item_name,
-            value=Response(
-                key=item.item_name,
-                value=payload.get("value"),
-                expired=datetime.fromisoformat(expired) if isinstance(expired, str) else None,
-                created=datetime.fromisoformat(created) if isinstance(created, str) else None,
-                updated=datetime.fromisoformat(updated) if isinstance(updated, str) else None,
-                id=UUID(payload.get("id")) if isinstance(payload.get("id"), str) else None,
-            )
-        )
+        return entry
+
+    def get(self, key: str, table_name: str) -> GetItem | None:
+        entry = self._live_entry(table_name, key)
+        if entry is None:
+            # Otro proceso pudo haber escrito la key: se relee el set una vez.
+            # La entrada vencida sigue en el set cifrado hasta que la purga el
+            # sweeper (o `set` la reemplaza); quitarla solo del espejo perdería escrituras.
+            self.reload(table_name)
+            entry = self._live_entry(table_name, key)
+        return entry.to_item() if entry is not None else None
     
     def get_by_parameter(self, parameter: str, equals: Any, table_name: str) -> GetItem:
-        try:
-            set_obj: es.Set = es.py_read_set(table_name)
-        except Exception:
+        table = self._load(table_name)
+        if table is None:
             raise NoneResultException(f"No exist set whit name = {table_name}")
-        try:
-            for it in set_obj.items():
-                key = it.item_name
-                payload = it.content
-                if isinstance(payload, str):
-                    try:
-                        payload = json.loads(payload)
-                    except Exception:
-                        continue
-                data = payload.get(parameter, None) if isinstance(payload, dict) else payload
-                if data is not None and type(data) == type(equals) and data == equals:
-                    created = it.created_at
-                    updated = it.updated_at
-                    expired = it.expired_at
-                    return GetItem(
-                        key=key,
-                        value=Response(
-                            key=key,
-                            value=val,
-                            expired=datetime.fromtimestamp(expired) if expired else None,
-                            created=datetime.fromtimestamp(created) if created else None,
-                            updated=datetime.fromtimestamp(updated) if updated else None,
-                            id=UUID(payload.get("id")) if isinstance(payload.get("id"), str) else None,
-                        )
-                    )
-        except Exception:
-            set_dict = json.loads(set_obj.to_json())
-            for it in set_dict.get("content", []):
-                key = it.get("item_name")
-                payload = it.get("content")
-                if isinstance(payload, str):
-                    try:
-                        payload = json.loads(payload)
-                    except Exception:
-                        continue
-                val = payload.get("value")
-                data = val.get(parameter, None) if isinstance(val, dict) else val
+        entry = self._find_by_parameter(table_name, table, parameter, equals)
+        if entry is None:
+            # Otro proceso pudo haber escrito el item: se relee el set una vez antes de rendirse.
+            self.reload(table_name)
+            table = self._load(table_name)
+            if table is not None:
+                entry = self._find_by_parameter(table_name, table, parameter, equals)
+        if entry is None:
+            raise NoneResultException(f"No exist item whit {parameter} = {equals}")
+        return entry.to_item()
+
+    def _find_by_parameter(self, table_name: str, table: Dict[str, _Entry], parameter: str, equals: Any) -> Optional[_Entry]:
+        token = _index_token(equals)
+        if token is None:
+            # Valores no hasheables no entran al índice: búsqueda lineal.
+            now = _now()
+            for entry in list(table.values()):
+                if _is_expired(entry.created, now):
+                    continue
+                data = _indexed_value(entry.value, parameter)
                 if data is not None and type(data) == type(equals) and data == equals:
-                    created = it.created_at
-                    updated = it.updated_at
-                    expired = it.expired_at
-                    return GetItem(
-                        key=key,
-                        value=Response(
-                            key=key,
-                            value=val,
-                            expired=datetime.fromtimestamp(expired) if expired else None,
-                            created=datetime.fromtimestamp(created) if created else None,
-                            updated=datetime.fromtimestamp(updated) if updated else None,
-                            id=UUID(payload.get("id")) if isinstance(payload.get("id"), str) else None,
-                        )
-                    )
-        raise NoneResultException(f"No exist item whit {parameter} = {equals}")
-
-    def set(self, key = None, value = None, table_name: str = "") -> GetItem:
+                    return entry
+            return None
 
-        match type(value):
-            case dict:
-                value = json.dumps(value)
+        index = self._indexes.get(table_name, {}).get(parameter)
+        for _ in range(2):
+            if index is None:
+                index = self._build_index(table_name, table, parameter)
+            key = index.get(token)
+            if key is None:
+                break
+            entry = table.get(key)
+            if (
+                entry is not None
+                and not _is_expired(entry.created, _now())
+                and _index_token(_indexed_value(entry.value, parameter)) == token
+            ):
+                return entry
+            # La key indexada se borró o venció: se reconstruye el índice una vez.
+            index = None
+        return None
 
-        item = es.py_create_item(
-            set_name=table_name,
-            item_name=key,
-            content=value,
-        )
-        try:
-            es.py_add_item(item)
-        except Exception:
-            console.print(f"Error to set item {key} in set {table_name} item already exist or another thing")
-            pass
-        item_model = GetItem(
-            key=key,
-            value=Response(
-                key=key,
-                value=value,
-                expired=datetime.fromtimestamp(item.expired_at) if item.expired_at else None,
-                created=datetime.fromtimestamp(item.created_at) if item.created_at else None,
-                updated=datetime.fromtimestamp(item.updated_at) if item.updated_at else None,
-                id=UUID(item.uuid_id),
+    def set(self, key = None, value = None, table_name: str = "") -> GetItem:
+        for attempt in range(2):
+            table = self._load(table_name)
+            current = table.get(key) if table is not None else None
+            if current is not None:
+                if not _is_expired(current.created, _now()):
+                    # La key ya existe: se actualiza en lugar de fallar en `py_add_item`.
+                    self._write_existing(table, key, value, table_name)
+                    return current.to_item()
+                # El item vencido aún existe en el set cifrado: se borra para poder recrearlo.
+                self.delete(key, table_name)
+
+            item = es.py_create_item(
+                set_name=table_name,
+                item_name=key,
+                content=json.dumps(value),
             )
-        )
-
-        return item_model
+            entry = self._entry_from_item(item)
+            try:
+                es.py_add_item(item)
+            except Exception:
+                if attempt == 0:
+                    # Otro worker o el CLI pudo haber creado la key: se relee el set y se reintenta.
+                    self.reload(table_name)
+                    continue
+                _LOGGER.warning("Error to set item %s in set %s: item already exists or storage error", key, table_name)
+                return entry.to_item()
+
+            table = self._load(table_name)
+            if table is not None:
+                with self._lock:
+                    table[key] = entry
+                    self._track_expiry(table_name, entry)
+                    self._index_entry(table_name, entry)
+            return entry.to_item()
 
     def delete(self, key, table_name: str) -> None:
         try:
@@ -341,12 +424,16 @@ class Singleton:
                 if getattr(it, "item_name", None) != key:
                     filtered_items.append(orjson.loads(it.to_json()))
             new_set = {"name": set_obj.name, "content": filtered_items}
-            es.py_save_data(table_name, orjson.dumps(new_set, default=date_encoder).decode())
+            es.py_save_data(table_name, orjson.dumps(new_set).decode())
         except Exception:
             set_dict = orjson.loads(set_obj.to_json())
             content = set_dict.get("content", [])
             set_dict["content"] = [it for it in content if it.get("item_name") != key]
-            es.py_save_data(table_name, orjson.dumps(set_dict, default=date_encoder).decode())
+            es.py_save_data(table_name, orjson.dumps(set_dict).decode())
+        table = self._tables.get(table_name)
+        if table is not None:
+            with self._lock:
+                table.pop(key, None)
 
     def clear(self, table_name: str = None) -> None:
         try:
@@ -355,23 +442,33 @@ class Singleton:
             s = es.py_create_set(table_name)
             es.py_save_data(table_name, s.to_json())
             return
-        set_dict = json.loads(set_obj.to_json())
+        set_dict = orjson.loads(set_obj.to_json())
         set_dict["content"] = []
-        es.py_save_data(table_name, json.dumps(set_dict, default=date_encoder))
+        es.py_save_data(table_name, orjson.dumps(set_dict).decode())
+        with self._lock:
+            self._tables[table_name] = {}
+            self._indexes.pop(table_name, None)
 
     def update(self, key, value, table_name) -> None:
-        try:
-            item: es.Item = es.py_find_item_in_set(table_name, item_name=key)
-        except Exception:
+        table = self._load(table_name)
+        current = table.get(key) if table is not None else None
+        if current is None or _is_expired(current.created, _now()):
             self.set(key=key, value=value, table_name=table_name)
             return
-        
-        match type(value):
-            case dict:
-                value = json.dumps(value)
+        self._write_existing(table, key, value, table_name)
 
+    def _write_existing(self, table: Dict[str, _Entry], key: str, value: Any, table_name: str) -> None:
         es.py_update_item_content_by_name(
             table_name=table_name,
             item_name=key,
-            content=value,
-        )
\ No newline at end of file
+            content=json.dumps(value),
+        )
+        with self._lock:
+            entry = table.get(key)
+            if entry is not None:
+                indexes = self._indexes.get(table_name, {})
+                for parameter in list(indexes):
+                    if _index_token(_indexed_value(entry.value, parameter)) != _index_token(_indexed_value(value, parameter)):
+                        del indexes[parameter]
+                entry.value = value
+                entry.updated = _now()
@@ -0,0 +1,49 @@
+"""Tests for the write-behind `last_login` updater."""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime
+
+from sqlmodel import SQLModel, Session, create_engine
+
+os.environ.setdefault("PASSLIB_PURE", "1")
+
+from app.core.services.last_login import LastLoginWriter
+from app.models import User
+
+
+def _make_user(index: int) -> User:
+    return User(
+        name=f"user{index}",
+        email=f"user{index}@example.com",
+        password="Password1!",
+        dni=f"{index:08d}",
+    )
+
+
+def test_persist_batches_and_keeps_latest_timestamp(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'last_login.db'}", echo=False)
+    SQLModel.metadata.create_all(engine)
+
+    first, second = _make_user(1), _make_user(2)
+    with Session(engine) as session:
+        session.add_all([first, second])
+        session.commit()
+        session.refresh(first)
+        session.refresh(second)
+
+    older = datetime(2024, 1, 1, 8, 0, 0)
+    newer = datetime(2024, 1, 1, 9, 0, 0)
+    writer = LastLoginWriter(lambda: Session(engine))
+    writer.persist(
+        [
+            (User, first.id, newer),
+            (User, first.id, older),
+            (User, second.id, older),
+        ]
+    )
+
+    with Session(engine) as session:
+        assert session.get(User, first.id).last_login == newer
+        assert session.get(User, second.id).last_login == older
@@ -1,6 +1,6 @@
 import pytest
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 from app.models import User, Doctors, DoctorStates
@@ -94,3 +94,24 @@ def test_doctor_ban_is_alias_of_deactivate():
 
     with pytest.raises(ValueError):
         doctor.ban()
+
+
+def test_password_needs_rehash_only_above_configured_cost():
+    user = build_user()
+
+    user.password = "$2b$12$" + "a" * 53
+    assert user.password_needs_rehash()
+
+    user.set_password("Password1!")
+    assert not user.password_needs_rehash()
+    assert user.check_password("Password1!")
+
+
+def test_mark_login_and_audit_default_to_utc_aware_timestamps():
+    user = build_user()
+
+    audit = user.mark_login()
+
+    assert user.last_login.utcoffset() == timedelta(0)
+    assert audit.timestamp.utcoffset() == timedelta(0)
+    assert user.date_joined.utcoffset() == timedelta(0)
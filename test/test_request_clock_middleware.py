@@ -0,0 +1,30 @@
+"""Tests for the middleware that stamps each request with a UTC clock."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+from app.core.middleware import RequestClockMiddleware
+
+
+def _run(scope: dict) -> dict:
+    seen: dict = {}
+
+    async def app(scope, receive, send):
+        seen.update(scope)
+
+    asyncio.run(RequestClockMiddleware(app)(scope, None, None))
+    return seen
+
+
+def test_http_requests_get_utc_aware_now() -> None:
+    scope = _run({"type": "http"})
+
+    assert scope["state"]["now"].utcoffset() == timedelta(0)
+
+
+def test_lifespan_scope_is_left_untouched() -> None:
+    scope = _run({"type": "lifespan"})
+
+    assert "state" not in scope
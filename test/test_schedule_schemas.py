@@ -0,0 +1,35 @@
+"""Tests for the `MedicalScheduleUpdate` time validation."""
+
+from __future__ import annotations
+
+from datetime import time
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.medica_area import MedicalScheduleUpdate
+
+
+def test_update_accepts_start_before_end() -> None:
+    update = MedicalScheduleUpdate(start_time="08:00", end_time="12:30")
+
+    assert update.start_time == time(8, 0)
+    assert update.end_time == time(12, 30)
+
+
+@pytest.mark.parametrize(("start", "end"), [("12:00", "08:00"), ("09:00", "09:00")])
+def test_update_rejects_start_not_before_end(start: str, end: str) -> None:
+    with pytest.raises(ValidationError, match="start_time debe ser menor que end_time"):
+        MedicalScheduleUpdate(start_time=start, end_time=end)
+
+
+@pytest.mark.parametrize("fields", [{"start_time": "23:00"}, {"end_time": "00:00"}, {"day": "monday"}])
+def test_partial_update_with_one_side_unset_is_valid(fields: dict) -> None:
+    update = MedicalScheduleUpdate(**fields)
+
+    assert update.model_dump(exclude_unset=True).keys() == fields.keys()
+
+
+def test_update_rejects_out_of_range_time() -> None:
+    with pytest.raises(ValidationError):
+        MedicalScheduleUpdate(start_time="24:00")
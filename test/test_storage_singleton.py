@@ -0,0 +1,280 @@
+"""Tests for the in-memory mirror of the encrypted storage `Singleton`."""
+
+from __future__ import annotations
+
+import sys
+import types
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import orjson
+import pytest
+
+
+class _StubItem:
+    def __init__(self, set_name: str, item_name: str, content: str):
+        now = datetime.now().timestamp()
+        self.set_name = set_name
+        self.item_name = item_name
+        self.content = content
+        self.created_at = now
+        self.updated_at = now
+        self.expired_at = None
+        self.uuid_id = str(uuid4())
+
+    def to_json(self) -> str:
+        return orjson.dumps(
+            {
+                "set_name": self.set_name,
+                "item_name": self.item_name,
+                "content": self.content,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+                "expired_at": self.expired_at,
+                "uuid_id": self.uuid_id,
+            }
+        ).decode()
+
+
+class _StubSet:
+    def __init__(self, name: str):
+        self.name = name
+        self.content: dict[str, _StubItem] = {}
+
+    def items(self) -> list[_StubItem]:
+        return list(self.content.values())
+
+    def to_json(self) -> str:
+        return orjson.dumps(
+            {"name": self.name, "content": [orjson.loads(it.to_json()) for it in self.items()]}
+        ).decode()
+
+
+class _StubStorage:
+    """Imita la API de `encript_storage` usada por `Singleton`."""
+
+    def __init__(self):
+        self.sets: dict[str, _StubSet] = {}
+
+    def py_read_set(self, name: str) -> _StubSet:
+        return self.sets[name]
+
+    def py_create_set(self, name: str) -> _StubSet:
+        return _StubSet(name)
+
+    def py_save_data(self, name: str, data: str) -> None:
+        stored = self.sets.setdefault(name, _StubSet(name))
+        keep = {it["item_name"] for it in orjson.loads(data).get("content") or []}
+        stored.content = {key: it for key, it in stored.content.items() if key in keep}
+
+    def py_create_item(self, set_name: str, item_name: str, content: str) -> _StubItem:
+        return _StubItem(set_name, item_name, content)
+
+    def py_add_item(self, item: _StubItem) -> None:
+        stored = self.sets[item.set_name]
+        if item.item_name in stored.content:
+            raise ValueError(f"Item {item.item_name} already exists")
+        stored.content[item.item_name] = item
+
+    def py_update_item_content_by_name(self, table_name: str, item_name: str, content: str) -> None:
+        self.sets[table_name].content[item_name].content = content
+
+
+# El módulo nativo no está disponible en todos los entornos; cada test
+# reemplaza `es` por un stub en memoria de todas formas.
+sys.modules.setdefault(
+    "encript_storage",
+    types.SimpleNamespace(Item=_StubItem, Set=_StubSet),
+)
+
+from app.storage import singleton_class as sc  # noqa: E402
+
+
+class _NoThread:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def start(self) -> None:
+        pass
+
+
+@pytest.fixture
+def stub() -> _StubStorage:
+    return _StubStorage()
+
+
+@pytest.fixture
+def storage(monkeypatch, stub) -> sc.Singleton:
+    monkeypatch.setattr(sc, "es", stub)
+    monkeypatch.setattr(sc, "Thread", _NoThread)
+    monkeypatch.setattr(sc.Singleton, "_instance", None)
+    instance = sc.Singleton()
+    instance.create_table("t")
+    return instance
+
+
+def _expire(storage: sc.Singleton, stub: _StubStorage, key: str, table_name: str = "t") -> None:
+    past = sc._now() - sc._ITEM_TTL - timedelta(minutes=1)
+    storage._tables[table_name][key].created = past
+    stub.sets[table_name].content[key].created_at = past.timestamp()
+
+
+def test_update_after_expired_get_persists_new_value(storage, stub) -> None:
+    storage.set("k", {"email": "a@x"}, "t")
+    _expire(storage, stub, "k")
+
+    assert storage.get("k", "t") is None
+
+    storage.update("k", {"email": "b@x"}, "t")
+
+    item = storage.get("k", "t")
+    assert item is not None
+    assert item.value.value == {"email": "b@x"}
+    assert orjson.loads(stub.sets["t"].content["k"].content) == {"email": "b@x"}
+
+
+def test_set_on_existing_key_updates_it(storage, stub) -> None:
+    storage.set("k", 1, "t")
+
+    assert storage.set("k", 2, "t").value.value == 2
+    assert storage.get("k", "t").value.value == 2
+    assert orjson.loads(stub.sets["t"].content["k"].content) == 2
+
+
+def test_reads_and_set_see_items_written_by_another_process(storage, stub) -> None:
+    storage.get_all("t")
+    # Otro worker (o el CLI) escribe directo en el set cifrado.
+    stub.sets["t"].content["g"] = _StubItem("t", "g", orjson.dumps({"email": "a@x"}).decode())
+
+    assert storage.get_by_parameter("email", "a@x", "t").key == "g"
+
+    stub.sets["t"].content["h"] = _StubItem("t", "h", orjson.dumps(1).decode())
+    assert storage.get("h", "t").value.value == 1
+
+    stub.sets["t"].content["s"] = _StubItem("t", "s", orjson.dumps(1).decode())
+    storage.set("s", 2, "t")
+    assert orjson.loads(stub.sets["t"].content["s"].content) == 2
+    assert storage.get("s", "t").value.value == 2
+
+
+def test_load_reads_each_set_once_until_reload(storage, stub, monkeypatch) -> None:
+    stub.sets["t"].content["k"] = _StubItem("t", "k", orjson.dumps({"a": 1}).decode())
+    storage.reload("t")
+    reads: list[str] = []
+    read_set = stub.py_read_set
+    monkeypatch.setattr(stub, "py_read_set", lambda name: reads.append(name) or read_set(name))
+
+    first = storage.get("k", "t")
+    storage.get("k", "t")
+    storage.get_all("t")
+
+    assert reads == ["t"]
+    assert first.value.value == {"a": 1}
+    assert str(first.value.id) == stub.sets["t"].content["k"].uuid_id
+
+    storage.reload("t")
+    storage.get("k", "t")
+    assert reads == ["t", "t"]
+
+
+def test_get_by_parameter_follows_update_and_delete(storage) -> None:
+    storage.set("1", {"email": "a@x"}, "t")
+    storage.set("2", {"email": "b@x"}, "t")
+    assert storage.get_by_parameter("email", "b@x", "t").key == "2"
+
+    storage.update("2", {"email": "c@x"}, "t")
+    assert storage.get_by_parameter("email", "c@x", "t").key == "2"
+    with pytest.raises(sc.NoneResultException):
+        storage.get_by_parameter("email", "b@x", "t")
+
+    storage.set("3", {"email": "a@x"}, "t")
+    storage.delete("1", "t")
+    assert storage.get_by_parameter("email", "a@x", "t").key == "3"
+
+    storage.delete("3", "t")
+    with pytest.raises(sc.NoneResultException):
+        storage.get_by_parameter("email", "a@x", "t")
+
+
+def test_get_by_parameter_skips_expired_index_hit(storage, stub) -> None:
+    storage.set("1", {"email": "a@x"}, "t")
+    assert storage.get_by_parameter("email", "a@x", "t").key == "1"
+
+    _expire(storage, stub, "1")
+    with pytest.raises(sc.NoneResultException):
+        storage.get_by_parameter("email", "a@x", "t")
+
+    storage.set("2", {"email": "a@x"}, "t")
+    assert storage.get_by_parameter("email", "a@x", "t").key == "2"
+
+
+def test_get_by_parameter_keeps_type_sensitive_matching(storage) -> None:
+    storage.set("1", {"n": 1}, "t")
+    storage.set("2", {"n": [1]}, "t")
+
+    with pytest.raises(sc.NoneResultException):
+        storage.get_by_parameter("n", True, "t")
+    assert storage.get_by_parameter("n", 1, "t").key == "1"
+    assert storage.get_by_parameter("n", [1], "t").key == "2"
+
+
+def test_purge_expired_removes_items_and_keeps_index_consistent(storage, stub) -> None:
+    storage.set("old", {"email": "a@x"}, "t")
+    storage.set("new", {"email": "b@x"}, "t")
+    storage.get_by_parameter("email", "a@x", "t")
+    _expire(storage, stub, "old")
+
+    storage.purge_expired("t")
+
+    assert set(stub.sets["t"].content) == {"new"}
+    assert set(storage._tables["t"]) == {"new"}
+    with pytest.raises(sc.NoneResultException):
+        storage.get_by_parameter("email", "a@x", "t")
+    assert storage.get_by_parameter("email", "b@x", "t").key == "new"
+
+    storage.set("old", {"email": "a@x"}, "t")
+    assert storage.get_by_parameter("email", "a@x", "t").key == "old"
+
+
+def test_sweep_expired_purges_only_due_tables(storage, stub) -> None:
+    storage.create_table("u")
+    storage.set("k", 1, "t")
+    storage.set("k", 1, "u")
+    _expire(storage, stub, "k", "t")
+    storage._track_expiry("t", storage._tables["t"]["k"])
+
+    storage.sweep_expired()
+
+    assert "k" not in stub.sets["t"].content
+    assert "k" in stub.sets["u"].content
+    assert storage.get("k", "u").value.value == 1
+
+
+def test_offset_bearing_timestamps_compare_with_utc_clock(storage, stub) -> None:
+    item = _StubItem("t", "k", orjson.dumps(1).decode())
+    offset = timezone(timedelta(hours=-3))
+    item.created_at = datetime.now(offset).isoformat()
+    item.updated_at = datetime.now().isoformat()
+    stub.sets["t"].content["k"] = item
+    storage.reload("t")
+
+    got = storage.get("k", "t")
+
+    assert got is not None
+    assert got.value.created.utcoffset() == timedelta(0)
+    assert got.value.updated.utcoffset() == timedelta(0)
+
+    item.created_at = (datetime.now(offset) - sc._ITEM_TTL - timedelta(minutes=1)).isoformat()
+    storage.reload("t")
+    assert storage.get("k", "t") is None
+
+
+def test_expiry_ignores_extension_expired_at(storage, stub) -> None:
+    item = _StubItem("t", "k", orjson.dumps(1).decode())
+    item.expired_at = (datetime.now() - timedelta(days=1)).timestamp()
+    stub.sets["t"].content["k"] = item
+    storage.reload("t")
+
+    assert storage.get("k", "t").value.value == 1
+    storage.purge_expired("t")
+    assert "k" in stub.sets["t"].content